@@ -0,0 +1,99 @@
+"""Reproducible synthetic markdown corpora for benchmarking.
+
+Every corpus is generated from a seeded RNG, so the same name, seed and
+scale always give byte-identical pages.
+"""
+import os
+import random
+
+WORDS = (
+    "the ring fellowship shire hobbit elf dwarf wizard mountain river forest "
+    "road king tower shadow light star song sword bow horse gate bridge hall "
+    "stone fire water wind journey council quest ancient silver golden grey"
+).split()
+
+# name: (pages, blocks per page, block kind weights)
+CORPORA = {
+    "small_pages": (2000, 8, {"paragraph": 5, "heading": 2, "list": 1, "code": 1, "quote": 1}),
+    "huge_pages": (4, 20000, {"paragraph": 5, "heading": 2, "list": 1, "code": 1, "quote": 1}),
+    "list_heavy": (200, 60, {"list": 6, "ordered": 4, "paragraph": 1}),
+    "link_heavy": (200, 60, {"links": 8, "paragraph": 1, "heading": 1}),
+    "code_heavy": (200, 60, {"code": 6, "paragraph": 2, "heading": 1}),
+}
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def inline_text(rng, count):
+    parts = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.08:
+            parts.append(f"**{words(rng, 2)}**")
+        elif roll < 0.14:
+            parts.append(f"_{words(rng, 2)}_")
+        elif roll < 0.18:
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        else:
+            parts.append(rng.choice(WORDS))
+    return " ".join(parts)
+
+
+def link_text(rng, count):
+    parts = []
+    for i in range(count):
+        if rng.random() < 0.2:
+            parts.append(f"![{words(rng, 2)}](/images/{rng.choice(WORDS)}{i}.png)")
+        else:
+            parts.append(f"[{words(rng, 2)}](/{rng.choice(WORDS)}/{i})")
+        parts.append(words(rng, rng.randint(1, 4)))
+    return " ".join(parts)
+
+
+def block(rng, kind):
+    if kind == "heading":
+        return "#" * rng.randint(2, 4) + " " + inline_text(rng, rng.randint(2, 6))
+    if kind == "list":
+        return "\n".join("- " + inline_text(rng, rng.randint(3, 10)) for _ in range(rng.randint(2, 8)))
+    if kind == "ordered":
+        return "\n".join(f"{i}. " + inline_text(rng, rng.randint(3, 10)) for i in range(1, rng.randint(3, 9)))
+    if kind == "code":
+        lines = [f"    {words(rng, rng.randint(2, 8))} = {rng.randint(0, 999)}" for _ in range(rng.randint(3, 15))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if kind == "quote":
+        return "\n".join("> " + inline_text(rng, rng.randint(4, 12)) for _ in range(rng.randint(1, 4)))
+    if kind == "links":
+        return link_text(rng, rng.randint(5, 20))
+    lines = [inline_text(rng, rng.randint(8, 16)) for _ in range(rng.randint(1, 5))]
+    return "\n".join(lines)
+
+
+def generate_page(rng, blocks, weights):
+    kinds = list(weights)
+    kind_weights = [weights[kind] for kind in kinds]
+    parts = ["# " + words(rng, rng.randint(2, 6)).title()]
+    for kind in rng.choices(kinds, kind_weights, k=blocks):
+        parts.append(block(rng, kind))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(name, seed=0, scale=1.0):
+    """Return a list of (relative .md path, markdown) pairs."""
+    page_count, blocks, weights = CORPORA[name]
+    rng = random.Random(f"{name}:{seed}")
+    page_count = max(1, int(page_count * scale))
+    pages = []
+    for i in range(page_count):
+        path = os.path.join(f"section{i % 20}", f"page{i}", "index.md")
+        pages.append((path, generate_page(rng, blocks, weights)))
+    return pages
+
+
+def write_corpus(pages, root):
+    for path, markdown in pages:
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(markdown)
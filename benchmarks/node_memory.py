@@ -0,0 +1,90 @@
+"""Per-node memory of the HTML node tree for a large synthetic page.
+
+Compares the slotted node classes against dict-backed copies of the
+previous implementation, built into the exact same tree shape.
+
+    python3 -m benchmarks.node_memory [--paragraphs N]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from markdown_to_html_node import markdown_to_html_node
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag=tag, value=value, children=None, props=props)
+
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag=tag, value=None, children=children, props=props)
+
+
+def synthetic_page(paragraphs):
+    lines = ["# Synthetic page", ""]
+    for i in range(paragraphs):
+        lines.append(f"Paragraph {i} has **bold**, _italic_ and `code` with a [link](/page/{i}) and ![image](/images/{i}.png).")
+        lines.append("")
+        lines.append(f"- item {i}\n- item **{i + 1}**\n- item _{i + 2}_")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def clone(node, leaf_cls, parent_cls):
+    props = dict(node.props) if node.props else None
+    if isinstance(node, ParentNode):
+        return parent_cls(node.tag, [clone(child, leaf_cls, parent_cls) for child in node.children], props)
+    return leaf_cls(node.tag, node.value, props)
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+
+def measure(tree, leaf_cls, parent_cls):
+    gc.collect()
+    tracemalloc.start()
+    copy = clone(tree, leaf_cls, parent_cls)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copy
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    args = parser.parse_args()
+
+    tree = markdown_to_html_node(synthetic_page(args.paragraphs))
+    nodes = count_nodes(tree)
+
+    before = measure(tree, DictLeafNode, DictParentNode)
+    after = measure(tree, LeafNode, ParentNode)
+
+    print(f"nodes:           {nodes}")
+    print(f"dict-backed:     {before / nodes:8.1f} bytes/node ({before / 1e6:.1f} MB)")
+    print(f"slotted:         {after / nodes:8.1f} bytes/node ({after / 1e6:.1f} MB)")
+    print(f"saved:           {100 * (1 - after / before):8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Check that the inline path scales linearly on pathological inputs.
+
+Each case is timed at a base size and at --factor times that size; the
+run fails if the time grows by more than --slack times the size factor
+(quadratic behaviour grows by the square of it).
+
+    python3 -m benchmarks.pathological [--size N] [--factor F] [--slack S]
+"""
+import argparse
+import sys
+import time
+
+from markdown_to_html_node import markdown_to_html_node
+from split_nodes import split_nodes_image, split_nodes_link
+from text_to_textnodes import text_to_textnodes
+from textnode import TextNode, TextType
+
+
+def many_links(n):
+    return "see [link](/page) and " * n
+
+
+def many_images(n):
+    return "![alt](/images/a.png) then " * n
+
+
+def unmatched_underscores(n):
+    return "snake_case " * (2 * n + 1)
+
+
+def unmatched_bold(n):
+    return "**a " * (2 * n + 1)
+
+
+def unmatched_mixed(n):
+    return "** _ ` " * n + "[l](u) " + "_ ` " * n
+
+
+def unclosed_links(n):
+    return "[text](url " * n
+
+
+def giant_paragraph(n):
+    return " ".join("word **bold** _it_ `code`" for _ in range(n))
+
+
+def split_links(text):
+    return split_nodes_link(split_nodes_image([TextNode(text, TextType.TEXT)]))
+
+
+CASES = [
+    ("many_links", many_links, text_to_textnodes),
+    ("many_links split_nodes", many_links, split_links),
+    ("many_images split_nodes", many_images, split_links),
+    ("unmatched_underscores", unmatched_underscores, text_to_textnodes),
+    ("unmatched_bold", unmatched_bold, text_to_textnodes),
+    ("unmatched_mixed", unmatched_mixed, text_to_textnodes),
+    ("unclosed_links", unclosed_links, text_to_textnodes),
+    ("giant_paragraph", giant_paragraph, markdown_to_html_node),
+]
+
+
+def best_time(fn, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=2000, help="base repetition count of each input")
+    parser.add_argument("--factor", type=int, default=8)
+    parser.add_argument("--slack", type=float, default=3.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bound = args.factor * args.slack
+    failed = []
+    print(f"{'case':<28}{'small s':>10}{'large s':>10}{'growth':>9}  (bound {bound:.0f}x)")
+    for name, make_input, fn in CASES:
+        small = best_time(fn, make_input(args.size), args.repeat)
+        large = best_time(fn, make_input(args.size * args.factor), args.repeat)
+        growth = large / small
+        status = "" if growth <= bound else "  FAIL"
+        print(f"{name:<28}{small:>10.4f}{large:>10.4f}{growth:>8.1f}x{status}")
+        if status:
+            failed.append(name)
+
+    if failed:
+        print(f"\nSuperlinear scaling: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
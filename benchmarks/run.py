@@ -0,0 +1,101 @@
+"""Time each stage of the markdown pipeline on the synthetic corpora.
+
+    python3 -m benchmarks.run [--corpus NAME ...] [--scale X] [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.corpus import CORPORA, generate_corpus, write_corpus
+from generate_pages_recursive import generate_pages_recursive
+from markdown_to_blocks import block_to_block_type, markdown_to_blocks, parse_blocks
+from markdown_to_html_node import markdown_to_html_node
+from text_to_textnodes import text_to_textnodes
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_PATH = os.path.join(ROOT_DIR, "template.html")
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def inline_texts(blocks):
+    # The text each block hands to text_to_textnodes, minus the block syntax
+    texts = []
+    for block in blocks:
+        if block.startswith("```"):
+            continue
+        for line in block.split("\n"):
+            texts.append(line.lstrip("#>-0123456789. "))
+    return texts
+
+
+def build_once(content_dir):
+    dest_dir = tempfile.mkdtemp(prefix="bench-site-")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content_dir, TEMPLATE_PATH, dest_dir)
+    finally:
+        shutil.rmtree(dest_dir)
+
+
+def bench_corpus(name, seed, scale, repeat, build):
+    pages = generate_corpus(name, seed, scale)
+    markdowns = [markdown for _, markdown in pages]
+    total_bytes = sum(len(markdown.encode('utf-8')) for markdown in markdowns)
+    blocks = [block for markdown in markdowns for block in markdown_to_blocks(markdown)]
+    texts = inline_texts(blocks)
+    nodes = [markdown_to_html_node(markdown) for markdown in markdowns]
+
+    stages = [
+        ("markdown_to_blocks", lambda: [markdown_to_blocks(markdown) for markdown in markdowns]),
+        ("block_to_block_type", lambda: [block_to_block_type(block) for block in blocks]),
+        ("parse_blocks", lambda: [list(parse_blocks(markdown.splitlines())) for markdown in markdowns]),
+        ("text_to_textnodes", lambda: [text_to_textnodes(text) for text in texts]),
+        ("markdown_to_html_node", lambda: [markdown_to_html_node(markdown) for markdown in markdowns]),
+        ("to_html", lambda: [node.to_html() for node in nodes]),
+    ]
+
+    content_dir = None
+    if build:
+        content_dir = tempfile.mkdtemp(prefix="bench-content-")
+        write_corpus(pages, content_dir)
+        stages.append(("generate_pages_recursive", lambda: build_once(content_dir)))
+
+    print(f"\n{name}: {len(pages)} pages, {len(blocks)} blocks, {total_bytes / 1e6:.2f} MB")
+    print(f"  {'stage':<26}{'seconds':>10}{'MB/s':>10}{'pages/s':>12}")
+    try:
+        for stage, fn in stages:
+            elapsed = best_time(fn, repeat)
+            print(f"  {stage:<26}{elapsed:>10.4f}{total_bytes / 1e6 / elapsed:>10.2f}{len(pages) / elapsed:>12.0f}")
+    finally:
+        if content_dir:
+            shutil.rmtree(content_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", nargs="+", choices=sorted(CORPORA), default=sorted(CORPORA))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the page count of every corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of this many runs")
+    parser.add_argument("--no-build", action="store_true", help="skip the full generate_pages_recursive build")
+    args = parser.parse_args()
+
+    for name in args.corpus:
+        bench_corpus(name, args.seed, args.scale, args.repeat, not args.no_build)
+
+
+if __name__ == "__main__":
+    main()
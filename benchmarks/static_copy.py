@@ -0,0 +1,95 @@
+"""Measure static file copying throughput on many-small-files and few-large-files trees.
+
+Each layout is copied into an empty directory by the old serial
+shutil.copy2 loop and by sync_directory with one and with several worker
+threads, and with hard links.
+
+    python3 -m benchmarks.static_copy [--layout NAME ...] [--scale X] [--workers N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from static_sync import COPY_WORKERS, list_files, sync_directory
+
+# name: (files, bytes per file, files per directory)
+LAYOUTS = {
+    "many_small": (20000, 8 * 1024, 500),
+    "few_large": (8, 64 * 1024 * 1024, 8),
+}
+
+
+def write_tree(root, files, size, per_dir, seed):
+    rng = random.Random(seed)
+    # Random bytes, so a filesystem can't get away with sparse or deduplicated files
+    block = rng.randbytes(min(size, 1024 * 1024))
+    for i in range(files):
+        directory = os.path.join(root, f"d{i // per_dir:04d}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"f{i:06d}.bin"), 'wb') as f:
+            remaining = size
+            while remaining:
+                chunk = block[:remaining]
+                f.write(chunk)
+                remaining -= len(chunk)
+
+
+def copy_serial(src, dst):
+    # What static syncing used to do: one shutil.copy2 after another
+    for rel_path in list_files(src):
+        dst_path = os.path.join(dst, rel_path)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        shutil.copy2(os.path.join(src, rel_path), dst_path)
+
+
+def best_time(fn, src, work_dir, repeat):
+    best = None
+    for i in range(repeat):
+        dst = os.path.join(work_dir, f"dst{i}")
+        start = time.perf_counter()
+        fn(src, dst)
+        elapsed = time.perf_counter() - start
+        shutil.rmtree(dst)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--layout", nargs="+", choices=sorted(LAYOUTS), default=sorted(LAYOUTS))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the number of files in each layout")
+    parser.add_argument("--workers", type=int, default=COPY_WORKERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", help="where to create the trees (defaults to the system temp directory)")
+    args = parser.parse_args()
+
+    quiet = lambda line: None
+    methods = [
+        ("serial copy2", copy_serial),
+        ("sync 1 worker", lambda src, dst: sync_directory(src, dst, log=quiet, workers=1)),
+        (f"sync {args.workers} workers", lambda src, dst: sync_directory(src, dst, log=quiet, workers=args.workers)),
+        ("sync hard links", lambda src, dst: sync_directory(src, dst, log=quiet, workers=args.workers, link=True)),
+    ]
+
+    for name in args.layout:
+        files, size, per_dir = LAYOUTS[name]
+        files = max(1, int(files * args.scale))
+        work_dir = tempfile.mkdtemp(prefix="bench-copy-", dir=args.dir)
+        try:
+            src = os.path.join(work_dir, "src")
+            write_tree(src, files, size, per_dir, seed=0)
+            total = files * size
+            print(f"\n{name}: {files} files, {total / 1e6:.0f} MB")
+            print(f"  {'method':<20}{'seconds':>10}{'MB/s':>10}{'files/s':>10}")
+            for label, fn in methods:
+                elapsed = best_time(fn, src, work_dir, args.repeat)
+                print(f"  {label:<20}{elapsed:>10.3f}{total / 1e6 / elapsed:>10.0f}{files / elapsed:>10.0f}")
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+python3 src/page_index.py "$@"
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+# Bump whenever a change to block rendering would make previously cached HTML wrong
+RENDERER_VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class BlockCache:
+    """On-disk map from a markdown block (plus renderer version and render
+    context) to its rendered HTML and plain text, evicted least-recently-used
+    past max_bytes.
+
+    Backed by SQLite so several worker processes can share one cache file.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(blocks)")]
+        if columns and "text" not in columns:
+            # Written before blocks kept their text; it's only a cache, so start over
+            self.connection.execute("DROP TABLE blocks")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS blocks"
+            " (key TEXT PRIMARY KEY, html TEXT NOT NULL, text TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS blocks_used ON blocks (used)")
+        self.connection.commit()
+
+    def key(self, block, context):
+        digest = hashlib.sha256(f"{RENDERER_VERSION}\0{context.key!r}\0".encode('utf-8'))
+        digest.update(block.encode('utf-8'))
+        return digest.hexdigest()
+
+    def lookup(self, blocks, context):
+        """Return the cached (html, text) for each block, or None where there is none."""
+        keys = [self.key(block, context) for block in blocks]
+        found = {}
+        # Stay under SQLite's limit on bound parameters
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.connection.execute(f"SELECT key, html, text FROM blocks WHERE key IN ({placeholders})", chunk)
+            found.update((key, (html, text)) for key, html, text in rows)
+        if found:
+            now = time.time()
+            self.connection.executemany("UPDATE blocks SET used = ? WHERE key = ?", [(now, key) for key in found])
+            self.connection.commit()
+        return [found.get(key) for key in keys]
+
+    def store(self, rendered, context):
+        """Cache a {block: (html, text)} mapping."""
+        if not rendered:
+            return
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO blocks (key, html, text, size, used) VALUES (?, ?, ?, ?, ?)",
+            [
+                (self.key(block, context), html, text, len(block) + len(html) + len(text), now)
+                for block, (html, text) in rendered.items()
+            ],
+        )
+        self.connection.commit()
+
+    def evict(self):
+        """Drop least recently used blocks until the cache fits in max_bytes."""
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        rows = self.connection.execute("SELECT key, size FROM blocks ORDER BY used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+            removed += 1
+        self.connection.executemany("DELETE FROM blocks WHERE key = ?", doomed)
+        self.connection.commit()
+        return removed
+
+    def close(self):
+        self.connection.close()
+
+
+_open_caches = {}
+
+
+def open_cache(path, max_bytes=DEFAULT_MAX_BYTES):
+    """Return this process's connection to the cache at path, opening it once."""
+    # Keyed by pid as well: a forked worker must not reuse its parent's SQLite connection
+    key = (os.getpid(), path)
+    cache = _open_caches.get(key)
+    if cache is None:
+        cache = BlockCache(path, max_bytes)
+        _open_caches[key] = cache
+    return cache
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import threading
+from build_manifest import hash_file
+
+ADDED = "added"
+CHANGED = "changed"
+REMOVED = "removed"
+
+
+def write_if_changed(path, data):
+    """Write bytes to path unless the file already holds exactly those bytes.
+
+    Returns ADDED, CHANGED or None when the file was left untouched, so its
+    mtime survives for rsync and CDN upload diffing.
+    """
+    try:
+        existing_size = os.path.getsize(path)
+    except FileNotFoundError:
+        existing_size = None
+
+    if existing_size == len(data):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return None
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return ADDED if existing_size is None else CHANGED
+
+
+class HashingWriter:
+    """Text file wrapper for streamed output: encodes, hashes and writes each chunk."""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk):
+        data = chunk.encode('utf-8')
+        self.digest.update(data)
+        self.size += len(data)
+        return self.fp.write(data)
+
+
+def replace_if_changed(tmp_path, path, writer):
+    """Move a freshly written tmp_path over path unless path already has the same content."""
+    try:
+        existing_size = os.path.getsize(path)
+    except FileNotFoundError:
+        existing_size = None
+
+    if existing_size == writer.size and hash_file(path) == writer.digest.hexdigest():
+        os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, path)
+    return ADDED if existing_size is None else CHANGED
+
+
+class BuildChanges:
+    """Output files one build added, changed or removed, for deploying only the delta.
+
+    Static syncing and page generation run at the same time, so recording
+    holds a lock.
+    """
+
+    def __init__(self):
+        self.paths = {ADDED: set(), CHANGED: set(), REMOVED: set()}
+        self.lock = threading.Lock()
+
+    def record(self, path, change):
+        if change is None:
+            return
+        with self.lock:
+            self.paths[change].add(path)
+
+    def record_removed(self, paths):
+        for path in paths:
+            self.record(path, REMOVED)
+
+    def to_dict(self, root):
+        return {
+            change: sorted(os.path.relpath(path, root) for path in paths)
+            for change, paths in self.paths.items()
+        }
+
+    def write(self, path, root):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(root), f, indent=2, sort_keys=True)
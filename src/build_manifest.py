@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import threading
+from block_cache import RENDERER_VERSION
+
+MANIFEST_VERSION = 1
+# Bump whenever a change to page generation (front matter, titles, templating,
+# minifying, ...) would change the HTML of a page whose inputs did not change
+GENERATOR_VERSION = 1
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """Remembers the inputs each output page was generated from.
+
+    Pages are keyed by their output path. An entry is fresh when the output
+    still exists and the source hash, template hash and basepath all match;
+    the source mtime and size are kept so unchanged files are never re-hashed.
+    With fingerprinted assets, the digest of the asset map has to match too,
+    and so does whether the page was minified. Pages generated by an older
+    generator or block renderer (see GENERATOR_VERSION) are stale as well.
+    Static assets copied into the output are tracked too, so only files the
+    build put there are ever deleted. The size and mtime of the page index
+    saved with the pages are kept too, so a build that regenerates nothing
+    can tell the index is current without reading it. Static syncing runs alongside page
+    generation, so updates and saves hold a lock.
+    """
+
+    def __init__(self, path, pages=None, assets=None, hashes=None, images=None, precompressed=(), links=None,
+                 page_index=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.assets = assets if assets is not None else {}
+        # path: [mtime_ns, size, content hash] for files hashed on every build
+        self.hashes = hashes if hashes is not None else {}
+        # path: [mtime_ns, size, [width, height] or None] for images under static
+        self.images = images if images is not None else {}
+        # dest path: [mtime_ns, size] of the static file it was hard-linked to
+        self.links = links if links is not None else {}
+        # Suffixes of the compressed siblings the last build wrote; None if not known
+        self.precompressed = list(precompressed) if precompressed is not None else None
+        # [mtime_ns, size] of the page index as saved alongside the pages
+        self.page_index = page_index
+        self.dirty = False
+        self.lock = threading.Lock()
+        self._hashes = {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}), data.get("assets", {}), data.get("hashes", {}), data.get("images", {}),
+                   data.get("precompressed"), data.get("links", {}), data.get("page_index"))
+
+    def save(self):
+        if not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with self.lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                data = {
+                    "version": MANIFEST_VERSION, "pages": self.pages, "assets": self.assets, "hashes": self.hashes,
+                    "images": self.images, "precompressed": self.precompressed, "links": self.links,
+                    "page_index": self.page_index,
+                }
+                json.dump(data, f, separators=(",", ":"), sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def source_hash(self, source_path):
+        if source_path not in self._hashes:
+            self._hashes[source_path] = hash_file(source_path)
+        return self._hashes[source_path]
+
+    def file_hash(self, path):
+        """Content hash of path, only re-hashed when its size or mtime changed."""
+        stat = os.stat(path)
+        entry = self.hashes.get(path)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+        digest = hash_file(path)
+        with self.lock:
+            self.hashes[path] = [stat.st_mtime_ns, stat.st_size, digest]
+            self.dirty = True
+        return digest
+
+    def record_precompressed(self, suffixes):
+        suffixes = list(suffixes)
+        with self.lock:
+            if self.precompressed != suffixes:
+                self.precompressed = suffixes
+                self.dirty = True
+
+    def record_page_index(self, stamp):
+        with self.lock:
+            if self.page_index != stamp:
+                self.page_index = stamp
+                self.dirty = True
+
+    def retain_hashes(self, paths, root):
+        """Forget the hashes of files under root that are not in paths."""
+        self._retain(self.hashes, paths, root)
+
+    def retain_images(self, paths, root):
+        """Forget the image sizes of files under root that are not in paths."""
+        self._retain(self.images, paths, root)
+
+    def _retain(self, entries, paths, root):
+        prefix = os.path.join(root, "")
+        keep = set(paths)
+        with self.lock:
+            for path in [path for path in entries if path.startswith(prefix) and path not in keep]:
+                del entries[path]
+                self.dirty = True
+
+    def is_fresh(self, source_path, dest_path, template_hash, basepath, assets_digest=None, minify=False):
+        entry = self.pages.get(dest_path)
+        if entry is None:
+            return False
+        if entry["source"] != source_path or entry["template_hash"] != template_hash or entry["basepath"] != basepath:
+            return False
+        if entry.get("assets") != assets_digest or entry.get("minify", False) != minify:
+            return False
+        if entry.get("generator") != generator_version():
+            return False
+        if not os.path.exists(dest_path):
+            return False
+
+        stat = os.stat(source_path)
+        if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return True
+        if entry["source_hash"] != self.source_hash(source_path):
+            return False
+
+        # Touched but not modified: remember the new stat so we skip hashing next time
+        with self.lock:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["size"] = stat.st_size
+            self.dirty = True
+        return True
+
+    def record(self, source_path, dest_path, template_hash, basepath, assets_digest=None, minify=False):
+        stat = os.stat(source_path)
+        entry = {
+            "source": source_path,
+            "source_hash": self.source_hash(source_path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "template_hash": template_hash,
+            "basepath": basepath,
+            "assets": assets_digest,
+            "minify": minify,
+            "generator": generator_version(),
+        }
+        with self.lock:
+            self.pages[dest_path] = entry
+            self.dirty = True
+
+    def remove_stale(self, dest_paths, dest_root):
+        """Delete outputs whose markdown source no longer exists."""
+        return self._remove_missing(self.pages, dest_paths, dest_root)
+
+    def record_asset(self, source_path, dest_path):
+        with self.lock:
+            if self.assets.get(dest_path) != source_path:
+                self.assets[dest_path] = source_path
+                self.dirty = True
+
+    def record_link(self, dest_path, stat):
+        """Remember the size and mtime of the file dest_path is a hard link to;
+        returns whether they differ from the last ones recorded.
+        """
+        value = [stat.st_mtime_ns, stat.st_size]
+        with self.lock:
+            if self.links.get(dest_path) == value:
+                return False
+            self.links[dest_path] = value
+            self.dirty = True
+        return True
+
+    def forget_link(self, dest_path):
+        with self.lock:
+            if self.links.pop(dest_path, None) is not None:
+                self.dirty = True
+
+    def remove_stale_assets(self, dest_paths, dest_root):
+        """Delete copied assets whose file was removed from the static directory."""
+        removed = self._remove_missing(self.assets, dest_paths, dest_root)
+        for dest_path in removed:
+            self.forget_link(dest_path)
+        return removed
+
+    def _remove_missing(self, entries, dest_paths, dest_root):
+        removed = []
+        prefix = os.path.join(dest_root, "")
+        with self.lock:
+            owned = {path for path in entries if path.startswith(prefix)}
+            for dest_path in sorted(owned - set(dest_paths)):
+                if os.path.exists(dest_path):
+                    os.remove(dest_path)
+                    prune_empty_dirs(os.path.dirname(dest_path), dest_root)
+                del entries[dest_path]
+                removed.append(dest_path)
+            if removed:
+                self.dirty = True
+        return removed
+
+
+def generator_version():
+    # A list, as that's what it reads back as from JSON
+    return [GENERATOR_VERSION, RENDERER_VERSION]
+
+
+def prune_empty_dirs(path, root):
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    while path != root and path.startswith(root + os.sep):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
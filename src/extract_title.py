@@ -1,3 +1,5 @@
+from markdown_to_blocks import BlockType
+
 def extract_title(markdown):
     lines = markdown.split('\n')
     
@@ -7,3 +9,28 @@ def extract_title(markdown):
             return stripped[1:].strip()
     
     raise Exception("No h1 header found")
+
+def front_matter_title(fields):
+    title = fields.get("title")
+    return title if isinstance(title, str) and title else None
+
+def heading_title(block_type, lines):
+    """The text of a parse_blocks() block if it is an h1, else None."""
+    if block_type == BlockType.HEADING and lines[0].startswith('# '):
+        return lines[0][1:].strip() or None
+    return None
+
+def page_title(fields, blocks):
+    """A page's title: the one in its front matter, else its first h1 block.
+
+    blocks are (BlockType, lines) pairs as made by parse_blocks; they are
+    only looked at up to the first h1.
+    """
+    title = front_matter_title(fields)
+    if title:
+        return title
+    for block_type, lines in blocks:
+        title = heading_title(block_type, lines)
+        if title:
+            return title
+    raise Exception("No h1 header found")
@@ -0,0 +1,69 @@
+import itertools
+import re
+
+DELIMITER = "---"
+# A block still open after this many lines is taken to be content, not front matter
+MAX_LINES = 200
+FIELD_PATTERN = re.compile(r"([A-Za-z_][\w-]*)\s*:\s*(.*)")
+
+
+def parse_value(value):
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item) for item in value[1:-1].split(",") if item.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_fields(lines):
+    """Parse "key: value" lines; "[a, b]" values and "- item" lines under an empty key are lists."""
+    fields = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None and isinstance(fields[key], list):
+            fields[key].append(parse_value(stripped[2:]))
+            continue
+        match = FIELD_PATTERN.fullmatch(stripped)
+        if match is None:
+            continue
+        key = match.group(1).lower()
+        value = match.group(2)
+        fields[key] = parse_value(value) if value.strip() else []
+    return fields
+
+
+def split_front_matter_lines(lines):
+    """Split the front matter off an iterable of lines.
+
+    Front matter is a block of "key: value" lines between two "---" lines
+    at the very top of a page. Returns (fields, lines), the lines being an
+    iterator over the rest of the page, so only the header is read up front.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    if first.rstrip("\r\n").strip() != DELIMITER:
+        return {}, itertools.chain([first], lines)
+
+    header = []
+    for line in lines:
+        if line.rstrip("\r\n").strip() == DELIMITER:
+            return parse_fields(header), lines
+        header.append(line)
+        if len(header) > MAX_LINES:
+            break
+    # Never closed: it was content after all
+    return {}, itertools.chain([first], header, lines)
+
+
+def split_front_matter(markdown):
+    """Return (fields, body) for a page's markdown."""
+    if not markdown.startswith(DELIMITER):
+        return {}, markdown
+    fields, rest = split_front_matter_lines(markdown.splitlines(keepends=True))
+    return fields, "".join(rest)
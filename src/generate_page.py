@@ -1,28 +1,85 @@
 import os
-from markdown_to_html_node import markdown_to_html_node
-from extract_title import extract_title
+from build_changes import HashingWriter, replace_if_changed
+from markdown_to_blocks import iter_lines_mmap, parse_blocks
+from markdown_to_html_node import blocks_to_html_node, iter_markdown_html
+from extract_title import page_title
+from front_matter import split_front_matter, split_front_matter_lines
+from metrics import NO_METRICS
+from minify import minify_chunks
+from page_options import DEFAULT_OPTIONS
+from template import load_template
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    
-    with open(from_path, 'r', encoding='utf-8') as f:
-        markdown = f.read()
-    
-    with open(template_path, 'r', encoding='utf-8') as f:
-        template = f.read()
-    
-    html_node = markdown_to_html_node(markdown)
-    content_html = html_node.to_html()
-    
-    title = extract_title(markdown)
-    
-    html = template.replace("{{ Title }}", title).replace("{{ Content }}", content_html)
-    
-    if basepath != "/":
-        html = html.replace('href="/', f'href="{basepath}')
-        html = html.replace('src="/', f'src="{basepath}')
-    
+# Sources at least this big are rendered block by block straight from a memory map
+STREAMING_THRESHOLD = 32 * 1024 * 1024
+
+def read_page(path, metrics=NO_METRICS):
+    """A page's markdown, or None when it's big enough to be streamed from a memory map instead."""
+    with metrics.stage("read"):
+        if os.path.getsize(path) >= STREAMING_THRESHOLD:
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+def render_page(from_path, markdown, context, metrics=NO_METRICS, block_cache=None, text=None):
+    """Parse a page and return its title and a function yielding its content as HTML chunks.
+
+    markdown is the page as read_page returned it; for None, the content is
+    rendered block by block from a memory map of from_path as the chunks are
+    taken. With a PageText, the page's title and plain text are collected
+    into it.
+    """
+    if markdown is None:
+        with metrics.stage("title"):
+            with open(from_path, 'r', encoding='utf-8') as f:
+                fields, lines = split_front_matter_lines(line.rstrip("\r\n") for line in f)
+                title = page_title(fields, parse_blocks(lines))
+        body = lambda: split_front_matter_lines(iter_lines_mmap(from_path))[1]
+        content = lambda: metrics.timed(iter_markdown_html(parse_blocks(body()), context, metrics, text), "render")
+    else:
+        fields, markdown = split_front_matter(markdown)
+        with metrics.stage("blocks"):
+            blocks = list(parse_blocks(markdown.splitlines()))
+        with metrics.stage("title"):
+            title = page_title(fields, blocks)
+        html_node = blocks_to_html_node(blocks, metrics, block_cache, context, text)
+        content = lambda: metrics.timed(html_node.iter_html(context), "render")
+
+    if text is not None:
+        text.title = title
+    return title, content
+
+def write_page(template, title, content, dest_path, metrics=NO_METRICS, minify=False):
+    """Write a page rendered by render_page through a bound template; returns ADDED, CHANGED or None."""
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    
-    with open(dest_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+
+    # Stream the content straight into a temporary file instead of building the
+    # page as one string, and only replace the output if the bytes differ
+    tmp_path = dest_path + ".tmp"
+    try:
+        with metrics.output():
+            with open(tmp_path, 'wb') as f:
+                writer = HashingWriter(f)
+                if minify:
+                    out = metrics.writer(writer)
+                    for chunk in minify_chunks(template.iter_render(Title=title, Content=content)):
+                        out.write(chunk)
+                else:
+                    template.write(metrics.writer(writer), Title=title, Content=content)
+        change = replace_if_changed(tmp_path, dest_path, writer)
+    except BaseException:
+        # The content renders as it's written, so a broken page fails here; don't leave half of it behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if metrics is not NO_METRICS:
+        metrics.count("bytes_written", writer.size)
+    return change
+
+def generate_page(from_path, template_path, dest_path, options=DEFAULT_OPTIONS, metrics=NO_METRICS, block_cache=None, text=None):
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+
+    with metrics.stage("template"):
+        template = load_template(template_path, options.context)
+    title, content = render_page(from_path, read_page(from_path, metrics), options.context, metrics, block_cache, text)
+    return write_page(template, title, content, dest_path, metrics, options.minify)
@@ -1,17 +1,129 @@
 import os
-from generate_page import generate_page
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from page_options import DEFAULT_OPTIONS
+from page_pipeline import generate_pages_pipelined
+from search_index import page_url
+from template import load_template
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
-    os.makedirs(dest_dir_path, exist_ok=True)
-    
-    for item in os.listdir(dir_path_content):
-        content_path = os.path.join(dir_path_content, item)
-        dest_path = os.path.join(dest_dir_path, item)
-        
-        if os.path.isfile(content_path):
+
+def collect_pages(dir_path_content, dest_dir_path):
+    pages = []
+    with os.scandir(dir_path_content) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+
+    for entry in entries:
+        item = entry.name
+        if entry.is_file():
             if item.endswith(".md"):
                 html_filename = item[:-3] + ".html"
-                html_dest_path = os.path.join(dest_dir_path, html_filename)
-                generate_page(content_path, template_path, html_dest_path, basepath)
+                pages.append((entry.path, os.path.join(dest_dir_path, html_filename)))
         else:
-            generate_pages_recursive(content_path, template_path, dest_path, basepath)
+            pages.extend(collect_pages(entry.path, os.path.join(dest_dir_path, item)))
+    return pages
+
+
+def generate_pages(pages, template_path, options=DEFAULT_OPTIONS, jobs=1, on_done=None):
+    if jobs <= 1 or len(pages) <= 1:
+        generate_pages_pipelined(pages, template_path, options, on_done)
+        return
+
+    # Largest pages first so one big file doesn't finish alone at the end, in
+    # batches so tiny pages don't pay a round trip to the pool each
+    ordered = sorted(pages, key=lambda page: os.path.getsize(page[0]), reverse=True)
+    batch_size = max(1, min(64, len(ordered) // (jobs * 8)))
+    batches = [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        futures = [executor.submit(generate_page_batch, batch, template_path, options) for batch in batches]
+        for future in as_completed(futures):
+            for result in future.result():
+                if on_done:
+                    on_done(*result)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def generate_page_batch(batch, template_path, options):
+    # Each worker runs its own pipeline, so its reads and writes overlap its rendering too
+    results = []
+    on_done = lambda *result: results.append(result)
+    generate_pages_pipelined(batch, template_path, options, on_done)
+    return results
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, options=DEFAULT_OPTIONS, manifest=None, jobs=1, metrics=None,
+                             changes=None, search=None, page_index=None):
+    os.makedirs(dest_dir_path, exist_ok=True)
+    options = options.replace(collect_metrics=metrics is not None, collect_text=search is not None)
+    basepath = options.basepath
+
+    pages = collect_pages(dir_path_content, dest_dir_path)
+
+    if manifest is None:
+        stale = pages
+    else:
+        template_hash = load_template(template_path).digest
+        assets_digest = options.context.assets_digest
+        stale = [
+            (content_path, html_dest_path)
+            for content_path, html_dest_path in pages
+            if not manifest.is_fresh(content_path, html_dest_path, template_hash, basepath, assets_digest, options.minify)
+            # Pages rendered before the search index was kept have to be read again for it
+            or (search is not None and html_dest_path not in search)
+        ]
+
+    if page_index is not None:
+        # Only pages being regenerated, or new to the index, can have changed since it was last
+        # updated; with none of those, none removed and the index as saved last time, it isn't read
+        read = []
+        if (manifest is None or stale or len(manifest.pages) != len(pages)
+                or manifest.page_index is None or manifest.page_index != page_index.stamp()):
+            stale_sources = {content_path for content_path, _ in stale}
+            read = page_index.update(
+                (content_path, page_url(html_dest_path, dest_dir_path))
+                for content_path, html_dest_path in pages
+                if content_path in stale_sources or content_path not in page_index
+            )
+            page_index.retain(content_path for content_path, _ in pages)
+            page_index.save()
+            if manifest is not None:
+                manifest.record_page_index(page_index.stamp())
+        print(f"Page index: {len(pages)} pages, {len(read)} read")
+
+    def record(content_path, html_dest_path, page_metrics, change, text):
+        if changes is not None:
+            changes.record(html_dest_path, change)
+        if manifest is not None:
+            manifest.record(content_path, html_dest_path, template_hash, basepath, assets_digest, options.minify)
+        if metrics is not None:
+            metrics.add_page(page_metrics)
+        if search is not None:
+            search.update(html_dest_path, page_url(html_dest_path, dest_dir_path, basepath), text)
+
+    if manifest is None:
+        generate_pages(stale, template_path, options, jobs, record)
+        if search is not None:
+            search.retain([dest_path for _, dest_path in pages])
+        return [dest_path for _, dest_path in stale]
+
+    try:
+        generate_pages(stale, template_path, options, jobs, record)
+    finally:
+        # Keep whatever finished so a failed build doesn't redo it next time
+        manifest.save()
+        if search is not None:
+            search.save()
+
+    removed = manifest.remove_stale([dest_path for _, dest_path in pages], dest_dir_path)
+    for dest_path in removed:
+        print(f"Removing stale page: {dest_path}")
+    if changes is not None:
+        changes.record_removed(removed)
+    manifest.save()
+    if search is not None:
+        search.retain([dest_path for _, dest_path in pages])
+        search.save()
+
+    print(f"{len(stale)} pages generated, {len(pages) - len(stale)} up to date")
+    return [dest_path for _, dest_path in stale]
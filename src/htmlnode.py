@@ -1,9 +1,18 @@
+import sys
+from render_context import DEFAULT_CONTEXT
+
+URL_PROPS = ("href", "src")
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        # Pages repeat a handful of tag names thousands of times; share one string per tag
+        self.tag = sys.intern(tag) if tag else tag
         self.value = value
         self.children = children
-        self.props = props
+        # Empty props are stored as None so nodes without attributes don't each own an empty dict
+        self.props = props or None
 
     def props_to_html(self):
         if not self.props:
@@ -17,15 +26,23 @@ class HTMLNode:
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
         
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag=tag, value=value, children=None, props=props)
 
-    def to_html(self):
+    def to_html(self, context=DEFAULT_CONTEXT):
         if self.tag == "img":
             if not self.props or "src" not in self.props:
                 raise ValueError("img tag requires src attribute")
             alt = self.props.get("alt", "")
-            return f'<img src="{self.props["src"]}" alt="{alt}" />'
+            src = self.props["src"]
+            if context.images is None:
+                return f'<img src="{context.url(src)}" alt="{alt}" />'
+            # Reserve the image's space before it arrives, and only fetch it near the viewport
+            size = context.image_size(src)
+            dimensions = f' width="{size[0]}" height="{size[1]}"' if size else ""
+            return f'<img src="{context.url(src)}" alt="{alt}"{dimensions} loading="lazy" decoding="async" />'
         
         if not self.value:
             raise ValueError
@@ -36,22 +53,45 @@ class LeafNode(HTMLNode):
         props_html = ""
         if self.props:
             for key, value in self.props.items():
+                if key in URL_PROPS:
+                    value = context.url(value)
                 props_html += f' {key}="{value}"'
         
         return f"<{self.tag}{props_html}>{self.value}</{self.tag}>"
 
+    def iter_html(self, context=DEFAULT_CONTEXT):
+        yield self.to_html(context)
+
+    def write_html(self, fp, context=DEFAULT_CONTEXT):
+        fp.write(self.to_html(context))
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, value=None, children=children, props=props)
 
-    def to_html(self):
-        if not self.tag:
-            raise ValueError
-        if not self.children:
-            raise ValueError
-        html = []
-        for child in self.children:
-            html.append(child.to_html())
-        return "<" + self.tag + ">" + "".join(html) + "</" + self.tag + ">"
+    def to_html(self, context=DEFAULT_CONTEXT):
+        return "".join(self.iter_html(context))
 
+    def write_html(self, fp, context=DEFAULT_CONTEXT):
+        for chunk in self.iter_html(context):
+            fp.write(chunk)
 
+    def iter_html(self, context=DEFAULT_CONTEXT):
+        # Walk the tree with an explicit stack so deep nesting can't hit the recursion limit
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, ParentNode):
+                if not node.tag:
+                    raise ValueError
+                if not node.children:
+                    raise ValueError
+                yield "<" + node.tag + ">"
+                stack.append("</" + node.tag + ">")
+                stack.extend(reversed(node.children))
+            else:
+                yield from node.iter_html(context)
@@ -0,0 +1,89 @@
+import os
+import struct
+from static_sync import list_files
+
+IMAGE_EXTENSIONS = (".png", ".gif", ".jpg", ".jpeg")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Start-of-frame markers carry the dimensions; C4, C8 and CC share the range but are something else
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers that stand alone, without a length
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7}
+
+
+def read_image_size(path):
+    """Read (width, height) from a PNG, GIF or JPEG file's header, or None if it isn't one."""
+    with open(path, 'rb') as f:
+        head = f.read(26)
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _read_jpeg_size(f)
+    return None
+
+
+def _read_jpeg_size(f):
+    # Walk the segments, skipping each by its length, until a start-of-frame
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":
+            # Fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image, or start of scan with no frame header seen
+            return None
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        length = struct.unpack(">H", length)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def cached_image_size(path, manifest):
+    stat = os.stat(path)
+    entry = manifest.images.get(path)
+    if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+        return tuple(entry[2]) if entry[2] else None
+    size = read_image_size(path)
+    with manifest.lock:
+        manifest.images[path] = [stat.st_mtime_ns, stat.st_size, list(size) if size else None]
+        manifest.dirty = True
+    return size
+
+
+def image_sizes(src, manifest):
+    """Map the site-absolute URL of each image under src to its (width, height).
+
+    Sizes are kept in the manifest by path, size and mtime, so an image's
+    header is only read again after it changes.
+    """
+    sizes = {}
+    src_paths = []
+    for rel_path in list_files(src):
+        if not rel_path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        src_path = os.path.join(src, rel_path)
+        src_paths.append(src_path)
+        size = cached_image_size(src_path, manifest)
+        if size is not None:
+            sizes["/" + rel_path.replace(os.sep, "/")] = size
+    manifest.retain_images(src_paths, src)
+    return sizes
@@ -1,48 +1,174 @@
+import argparse
 import os
 import shutil
-import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from textnode import TextNode, TextType
+from block_cache import open_cache
+from build_changes import BuildChanges
+from build_manifest import BuildManifest
 from generate_pages_recursive import generate_pages_recursive
+from image_index import image_sizes
+from metrics import BuildMetrics
+from page_options import PageOptions
+from page_index import PAGE_INDEX_PATH, PageIndex
+from precompress import COMPRESSORS, GZIP, MIN_SIZE, ZSTD, precompress_directory, remove_precompressed
+from render_context import RenderContext
+from search_index import SearchIndex, remove_search_index
+from static_sync import HEADERS_FILE, asset_urls, fingerprint_assets, sync_directory, write_asset_headers
 
-def copy_directory_contents(src, dst):
-    if os.path.exists(dst):
-        print(f"Removing existing directory: {dst}")
-        shutil.rmtree(dst)
-    
-    os.makedirs(dst, exist_ok=True)
-    
-    for item in os.listdir(src):
-        src_path = os.path.join(src, item)
-        dst_path = os.path.join(dst, item)
-        
-        if os.path.isfile(src_path):
-            print(f"Copying file: {src_path} -> {dst_path}")
-            shutil.copy2(src_path, dst_path)
-        else:
-            print(f"Copying directory: {src_path} -> {dst_path}")
-            copy_directory_contents(src_path, dst_path)
+MANIFEST_PATH = os.path.join(".cache", "build-manifest.json")
+BLOCK_CACHE_PATH = os.path.join(".cache", "blocks.sqlite3")
+SEARCH_INDEX_PATH = os.path.join(".cache", "search-index.json")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served from")
+    parser.add_argument("--full", action="store_true", help="ignore the build manifest and rebuild every page")
+    parser.add_argument("--hash-static", action="store_true", help="hash static files even when their size and mtime match the output")
+    parser.add_argument("--no-block-cache", action="store_true", help="render every block instead of reusing cached HTML")
+    parser.add_argument("--block-cache-size", type=int, default=256, metavar="MB", help="size limit of the on-disk block cache")
+    parser.add_argument("--link-static", action="store_true",
+                        help="hard-link static files into the output instead of copying them, where the filesystem allows")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="publish static assets as name.<hash>.ext, rewrite references to them and mark them immutable in _headers")
+    parser.add_argument("--no-image-sizes", action="store_true",
+                        help="render images without width/height and lazy-loading attributes")
+    parser.add_argument("--search", action="store_true", help="write a sharded search index of the pages' text to search/")
+    parser.add_argument("--minify", action="store_true", help="strip comments and collapse whitespace in generated pages")
+    parser.add_argument("--precompress", action="store_true", help="write .gz siblings next to compressible output files")
+    parser.add_argument("--zstd", action="store_true", help="with --precompress, also write .zst siblings (needs Python 3.14 or zstandard)")
+    parser.add_argument("--precompress-min-size", type=int, default=MIN_SIZE, metavar="BYTES",
+                        help="don't precompress files smaller than this")
+    parser.add_argument("--changes", metavar="OUT_JSON", help="write the output paths this build added, changed or removed to this file")
+    parser.add_argument("--metrics", metavar="OUT_JSON", help="write per-stage build timings and counters to this file")
+    parser.add_argument("--metrics-top", type=int, default=10, metavar="N", help="number of slowest pages listed in the metrics report")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes for page generation (0 uses every CPU)")
+    return parser.parse_args(argv)
+
+def build(basepath="/", dest_dir="docs", full=False, jobs=1, hash_static=False, metrics_path=None, metrics_top=10,
+          block_cache=True, block_cache_size=256, changes_path=None, fingerprint=False, precompress=(),
+          precompress_min_size=MIN_SIZE, minify=False, size_images=True,
+          search=False, link_static=False):
+    metrics = BuildMetrics() if metrics_path else None
+    changes = BuildChanges()
+    cache_path = BLOCK_CACHE_PATH if block_cache else None
+    if cache_path:
+        cache = open_cache(cache_path, block_cache_size * 1024 * 1024)
+
+    if full:
+        if os.path.exists(dest_dir):
+            print(f"Removing existing directory: {dest_dir}")
+            shutil.rmtree(dest_dir)
+        manifest = BuildManifest(MANIFEST_PATH)
+        page_index = PageIndex(PAGE_INDEX_PATH)
+        search_index = SearchIndex(SEARCH_INDEX_PATH) if search else None
+    else:
+        manifest = BuildManifest.load(MANIFEST_PATH)
+        page_index = PageIndex.load(PAGE_INDEX_PATH)
+        search_index = SearchIndex.load(SEARCH_INDEX_PATH) if search else None
+
+    # Fingerprinted names have to be known before any page is rendered
+    names = fingerprint_assets("static", manifest) if fingerprint else None
+    assets = asset_urls(names) if names else None
+    # Image headers are only read for images that changed since the last build
+    images = image_sizes("static", manifest) if size_images else None
+    options = PageOptions(basepath, assets, images, minify=minify, cache_path=cache_path)
+
+    # Static files are copied on a thread of their own while pages are generated;
+    # their log is held back so it doesn't interleave with the page output
+    static_log = []
+    def sync_static():
+        with metrics.stage("static") if metrics else nullcontext():
+            sync_directory("static", dest_dir, manifest, use_hash=hash_static, log=static_log.append, changes=changes, names=names,
+                           link=link_static)
+
+    print(f"\nGenerating pages recursively to {dest_dir}...")
+    with ThreadPoolExecutor(max_workers=1) as static_executor:
+        static = static_executor.submit(sync_static)
+        try:
+            with metrics.stage("pages") if metrics else nullcontext():
+                generate_pages_recursive("content", "template.html", dest_dir, options, manifest, jobs, metrics, changes, search_index,
+                                         page_index)
+            print("Page generation completed!")
+        finally:
+            static.result()
+            print(f"\nSynced static directory to {dest_dir}:")
+            for line in static_log:
+                print(line)
+    manifest.save()
+    if search_index is not None:
+        search_index.write(dest_dir, changes)
+        search_index.save()
+    else:
+        changes.record_removed(remove_search_index(dest_dir, SEARCH_INDEX_PATH))
+    changes.record(os.path.join(dest_dir, HEADERS_FILE), write_asset_headers(dest_dir, assets, RenderContext(basepath)))
+
+    # Siblings of a suffix this build doesn't write would be left to go stale next to
+    # their files; a manifest from before this was recorded may have left any
+    previous = manifest.precompressed if manifest.precompressed is not None else (GZIP, ZSTD)
+    dropped = [suffix for suffix in previous if suffix not in precompress]
+    if dropped:
+        print(f"\nRemoving {', '.join(dropped)} files from {dest_dir}...")
+        remove_precompressed(dest_dir, dropped, changes, keep=manifest.assets)
+    if precompress:
+        print(f"\nPrecompressing output in {dest_dir}...")
+        with metrics.stage("precompress") if metrics else nullcontext():
+            precompress_directory(dest_dir, precompress, precompress_min_size, changes=changes, keep=manifest.assets)
+    manifest.record_precompressed(precompress)
+    manifest.save()
+
+    if cache_path:
+        evicted = cache.evict()
+        if evicted:
+            print(f"Evicted {evicted} blocks from the block cache")
+
+    counts = {change: len(paths) for change, paths in changes.paths.items()}
+    print(f"\nOutput: {counts['added']} added, {counts['changed']} changed, {counts['removed']} removed")
+    if changes_path:
+        changes.write(changes_path, dest_dir)
+        print(f"Changes written to {changes_path}")
+
+    if metrics:
+        metrics.write(metrics_path, metrics_top)
+        print(f"Metrics written to {metrics_path}")
 
 def main():
     text_node = TextNode("abc", TextType.BOLD, "www.abc.com")
     print(text_node)
-    
+
     # Get basepath from CLI argument, default to "/"
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
-    
+    args = parse_args()
+    basepath = args.basepath
+
     print(f"\nUsing basepath: {basepath}")
-    
+
     # For GitHub Pages, build into docs directory
-    dest_dir = "docs"
-    
-    print(f"\nCopying static directory to {dest_dir}...")
-    copy_directory_contents("static", dest_dir)
-    print("Copy completed!")
-    
-    print(f"\nGenerating pages recursively to {dest_dir}...")
-    generate_pages_recursive("content", "template.html", dest_dir, basepath)
-    print("Page generation completed!")
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    precompress = ()
+    if args.precompress:
+        precompress = (GZIP, ZSTD) if args.zstd else (GZIP,)
+        if ZSTD in precompress and ZSTD not in COMPRESSORS:
+            raise SystemExit("--zstd needs Python 3.14 or the zstandard package")
+    build(
+        basepath,
+        "docs",
+        full=args.full,
+        jobs=jobs,
+        hash_static=args.hash_static,
+        metrics_path=args.metrics,
+        metrics_top=args.metrics_top,
+        block_cache=not args.no_block_cache,
+        block_cache_size=args.block_cache_size,
+        changes_path=args.changes,
+        fingerprint=args.fingerprint,
+        precompress=precompress,
+        precompress_min_size=args.precompress_min_size,
+        minify=args.minify,
+        size_images=not args.no_image_sizes,
+        search=args.search,
+        link_static=args.link_static,
+    )
 
 if __name__ == "__main__":
     main()
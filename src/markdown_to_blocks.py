@@ -1,3 +1,4 @@
+import mmap
 from enum import Enum
 
 
@@ -30,6 +31,89 @@ def markdown_to_blocks(markdown):
     
     return blocks
 
+# How much of a memory-mapped file is decoded at a time
+MMAP_WINDOW = 1 << 20
+
+
+def iter_lines_mmap(path):
+    """Yield the lines of a UTF-8 file like str.splitlines(), decoding a window at a time."""
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            return
+        with data:
+            start = 0
+            size = len(data)
+            while start < size:
+                end = size
+                if start + MMAP_WINDOW < size:
+                    # Cut after a newline so no line or UTF-8 sequence is split
+                    cut = data.rfind(b"\n", start, start + MMAP_WINDOW)
+                    if cut == -1:
+                        cut = data.find(b"\n", start + MMAP_WINDOW)
+                    if cut != -1:
+                        end = cut + 1
+                yield from data[start:end].decode('utf-8').splitlines()
+                start = end
+
+
+def parse_blocks(lines):
+    """Yield a (BlockType, lines) pair for every block, looking at each line once.
+
+    Blocks and types match markdown_to_blocks + block_to_block_type: blank
+    lines separate blocks, a block's first line is lstripped and its last
+    line rstripped, and the quote/list checks are kept up to date as lines
+    arrive instead of re-scanning the finished block.
+    """
+    block = []
+    quote = unordered = ordered = False
+    for line in lines:
+        if not line.strip():
+            if block:
+                yield finish_block(block, quote, unordered, ordered)
+                block = []
+            continue
+
+        if block:
+            # The previous line is no longer the last one, so it is final as is
+            previous = block[-1]
+            quote = quote and previous.startswith(">")
+            unordered = unordered and previous.startswith("- ")
+            ordered = ordered and len(block) <= 9 and previous.startswith(f"{len(block)}. ")
+            block.append(line)
+        else:
+            block = [line.lstrip()]
+            quote = unordered = ordered = True
+
+    if block:
+        yield finish_block(block, quote, unordered, ordered)
+
+
+def finish_block(block, quote, unordered, ordered):
+    last = block[-1] = block[-1].rstrip()
+    number = len(block)
+    quote = quote and last.startswith(">")
+    unordered = unordered and last.startswith("- ")
+    ordered = ordered and number <= 9 and last.startswith(f"{number}. ")
+
+    first = block[0]
+    if first.startswith("#"):
+        level = len(first) - len(first.lstrip("#"))
+        if level <= 6 and first[level:level + 1] == " ":
+            return BlockType.HEADING, block
+    if len(block) >= 2 and first.startswith("```") and last.startswith("```"):
+        return BlockType.CODE, block
+    if quote:
+        return BlockType.QUOTE, block
+    if unordered:
+        return BlockType.UNORDERED_LIST, block
+    if ordered:
+        return BlockType.ORDERED_LIST, block
+    return BlockType.PARAGRAPH, block
+
+
 def block_to_block_type(block):
     lines = block.split("\n")
     
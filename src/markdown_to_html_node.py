@@ -1,8 +1,10 @@
 from htmlnode import HTMLNode, LeafNode, ParentNode
 from textnode import TextNode, TextType
-from markdown_to_blocks import BlockType, block_to_block_type, markdown_to_blocks
+from markdown_to_blocks import BlockType, parse_blocks
 from text_to_textnodes import text_to_textnodes
 from text_node_to_html_node import text_node_to_html_node
+from metrics import NO_METRICS
+from render_context import DEFAULT_CONTEXT
 
 
 def text_to_children(text):
@@ -14,7 +16,8 @@ def text_to_children(text):
     return html_nodes
 
 
-def heading_block_to_html_node(block):
+def heading_block_to_html_node(lines):
+    block = "\n".join(lines)
     level = 0
     for i in range(len(block)):
         if block[i] == "#":
@@ -30,16 +33,13 @@ def heading_block_to_html_node(block):
     return ParentNode(f"h{level}", children)
     
 
-def paragraph_block_to_html_node(block):
-    lines = block.split("\n")
+def paragraph_block_to_html_node(lines):
     text = " ".join(line.strip() for line in lines)
     children = text_to_children(text)
     return ParentNode("p", children)
 
 
-def code_block_to_html_node(block):
-    lines = block.split("\n")
-    
+def code_block_to_html_node(lines):
     if len(lines) >= 2 and lines[0].startswith("```") and lines[-1].startswith("```"):
         code_lines = lines[1:-1]
         code_content = "\n".join(code_lines)
@@ -50,8 +50,7 @@ def code_block_to_html_node(block):
     # ... rest
 
 
-def quote_block_to_html_node(block):
-    lines = block.split("\n")
+def quote_block_to_html_node(lines):
     quote_lines = []
     
     for line in lines:
@@ -64,8 +63,7 @@ def quote_block_to_html_node(block):
     return ParentNode("blockquote", children)
 
 
-def unordered_list_block_to_html_node(block):
-    lines = block.split("\n")
+def unordered_list_block_to_html_node(lines):
     list_items = []
     
     for line in lines:
@@ -78,8 +76,7 @@ def unordered_list_block_to_html_node(block):
     return ParentNode("ul", list_items)
 
 
-def ordered_list_block_to_html_node(block):
-    lines = block.split("\n")
+def ordered_list_block_to_html_node(lines):
     list_items = []
     
     for i, line in enumerate(lines):
@@ -93,27 +90,139 @@ def ordered_list_block_to_html_node(block):
     return ParentNode("ol", list_items)
 
 
-def markdown_to_html_node(markdown):
-    """Convert a full markdown document to an HTML node."""
-    blocks = markdown_to_blocks(markdown)
+def block_to_html_node(block_type, lines):
+    if block_type == BlockType.HEADING:
+        return heading_block_to_html_node(lines)
+    if block_type == BlockType.CODE:
+        return code_block_to_html_node(lines)
+    if block_type == BlockType.QUOTE:
+        return quote_block_to_html_node(lines)
+    if block_type == BlockType.UNORDERED_LIST:
+        return unordered_list_block_to_html_node(lines)
+    if block_type == BlockType.ORDERED_LIST:
+        return ordered_list_block_to_html_node(lines)
+    return paragraph_block_to_html_node(lines)
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+
+def block_text(node):
+    """The plain text of a block's inline nodes (alt text for images); none for code blocks."""
+    if node.tag == "pre":
+        return ""
+    parts = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.children:
+            stack.extend(reversed(node.children))
+        elif node.tag == "img":
+            parts.append(node.props.get("alt", ""))
+        elif node.value:
+            parts.append(node.value)
+    return " ".join(parts)
+
+
+def markdown_to_html_node(markdown, metrics=NO_METRICS, cache=None, context=DEFAULT_CONTEXT, text=None):
+    """Convert a full markdown document to an HTML node.
+
+    With a BlockCache, blocks seen before (under the same render context)
+    come back as pre-rendered HTML and skip inline parsing. With a text
+    collector (see search_index.PageText), each block's plain text is added
+    to it.
+
+    The "nodes" counter is the number of nodes built from markdown, counted
+    before rendered blocks are swapped for their cached HTML; blocks served
+    from the cache build none and are counted in "cache_hits" instead.
+    Rendering blocks for the cache is timed under "render", like rendering
+    them while the page is written.
+    """
+    with metrics.stage("blocks"):
+        parsed = list(parse_blocks(markdown.splitlines()))
+    return blocks_to_html_node(parsed, metrics, cache, context, text)
+
+
+def blocks_to_html_node(parsed, metrics=NO_METRICS, cache=None, context=DEFAULT_CONTEXT, text=None):
+    """markdown_to_html_node for a list of (BlockType, lines) pairs already made by parse_blocks."""
+    with metrics.stage("blocks"):
+        if cache is None:
+            blocks = None
+            cached = [None] * len(parsed)
+        else:
+            # The cache is keyed by block text, which is only needed when caching
+            blocks = ["\n".join(lines) for _, lines in parsed]
+            cached = cache.lookup(blocks, context)
+    metrics.count("blocks", len(parsed))
+
     html_nodes = []
-    
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        
-        if block_type == BlockType.HEADING:
-            node = heading_block_to_html_node(block)
-        elif block_type == BlockType.CODE:
-            node = code_block_to_html_node(block)
-        elif block_type == BlockType.QUOTE:
-            node = quote_block_to_html_node(block)
-        elif block_type == BlockType.UNORDERED_LIST:
-            node = unordered_list_block_to_html_node(block)
-        elif block_type == BlockType.ORDERED_LIST:
-            node = ordered_list_block_to_html_node(block)
-        else:  # PARAGRAPH
-            node = paragraph_block_to_html_node(block)
-        
-        html_nodes.append(node)
-    
+    plains = {}
+
+    with metrics.stage("inline"):
+        for i, (block_type, lines) in enumerate(parsed):
+            if cached[i] is not None:
+                html, plain = cached[i]
+                if text is not None:
+                    text.add(plain)
+                html_nodes.append(LeafNode(None, html))
+                continue
+
+            node = block_to_html_node(block_type, lines)
+            if cache is not None or text is not None:
+                plain = plains[i] = block_text(node)
+                if text is not None:
+                    text.add(plain)
+            html_nodes.append(node)
+
+    if metrics is not NO_METRICS:
+        metrics.count("nodes", 1 + sum(count_nodes(html_nodes[i]) for i in range(len(parsed)) if cached[i] is None))
+
+    if cache is not None:
+        # Render once now for the cache and reuse that string when the page is written
+        rendered = {}
+        misses = cached.count(None)
+        if misses:
+            with metrics.stage("render"):
+                for i, node in enumerate(html_nodes):
+                    if cached[i] is None:
+                        html = node.to_html(context)
+                        rendered[blocks[i]] = (html, plains[i])
+                        html_nodes[i] = LeafNode(None, html)
+
+        metrics.count("cache_hits", len(parsed) - misses)
+        metrics.count("cache_misses", misses)
+        cache.store(rendered, context)
+
     return ParentNode("div", html_nodes)
+
+
+def iter_markdown_html(blocks, context=DEFAULT_CONTEXT, metrics=NO_METRICS, text=None):
+    """Render an iterable of (BlockType, lines) pairs, as made by parse_blocks,
+    to HTML chunks one block at a time.
+
+    Produces the same HTML as markdown_to_html_node(...).iter_html(context)
+    without ever holding more than one block's nodes.
+    """
+    empty = True
+    metrics.count("nodes")
+    yield "<div>"
+    for block_type, lines in blocks:
+        empty = False
+        metrics.count("blocks")
+        node = block_to_html_node(block_type, lines)
+        if metrics is not NO_METRICS:
+            metrics.count("nodes", count_nodes(node))
+        if text is not None:
+            text.add(block_text(node))
+        yield from node.iter_html(context)
+    if empty:
+        raise ValueError
+    yield "</div>"
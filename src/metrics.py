@@ -0,0 +1,144 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class PageMetrics:
+    """Stage timings and counters for a single generated page.
+
+    Rendering, templating and writing are interleaved while the page is
+    streamed out, so the time spent producing node chunks ("render") and
+    inside fp.write ("write") is measured directly and "template" is what
+    remains of the output phase.
+    """
+
+    def __init__(self, source, dest):
+        self.source = source
+        self.dest = dest
+        self.stages = {}
+        self.counters = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed(self, chunks, name):
+        iterator = iter(chunks)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield chunk
+
+    def writer(self, fp):
+        return TimedWriter(fp, self)
+
+    @contextmanager
+    def output(self):
+        start = time.perf_counter()
+        render, write = self.stages.get("render", 0.0), self.stages.get("write", 0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self.stages.get("render", 0.0) - render + self.stages.get("write", 0.0) - write
+            self.add("template", max(0.0, elapsed - nested))
+
+    def to_dict(self):
+        return {
+            "source": self.source,
+            "dest": self.dest,
+            "seconds": sum(self.stages.values()),
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+
+
+class TimedWriter:
+    def __init__(self, fp, metrics):
+        self.fp = fp
+        self.metrics = metrics
+
+    def write(self, chunk):
+        start = time.perf_counter()
+        result = self.fp.write(chunk)
+        self.metrics.add("write", time.perf_counter() - start)
+        return result
+
+
+class NullMetrics:
+    """Stand-in used when metrics are off, so the pipeline doesn't branch on it."""
+
+    def add(self, name, seconds):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+    def stage(self, name):
+        return nullcontext()
+
+    def timed(self, chunks, name):
+        return chunks
+
+    def writer(self, fp):
+        return fp
+
+    def output(self):
+        return nullcontext()
+
+
+NO_METRICS = NullMetrics()
+
+
+class BuildMetrics:
+    def __init__(self):
+        self.stages = {}
+        self.pages = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def add_page(self, page):
+        self.pages.append(page)
+
+    def summary(self, top=10):
+        page_stages = {}
+        counters = {}
+        for page in self.pages:
+            for name, seconds in page["stages"].items():
+                page_stages[name] = page_stages.get(name, 0.0) + seconds
+            for name, amount in page["counters"].items():
+                counters[name] = counters.get(name, 0) + amount
+
+        slowest = sorted(self.pages, key=lambda page: page["seconds"], reverse=True)[:top]
+        return {
+            "pages": len(self.pages),
+            "build_stages": self.stages,
+            "page_stages": page_stages,
+            "counters": counters,
+            "slowest_pages": slowest,
+        }
+
+    def write(self, path, top=10):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(top), f, indent=2, sort_keys=True)
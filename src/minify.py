@@ -0,0 +1,124 @@
+import re
+
+# Elements whose content is passed through untouched
+RAW_TAGS = ("pre", "code", "textarea", "script", "style")
+
+TOKEN_PATTERN = re.compile(r"<!--|<[A-Za-z/!?]|\s+")
+# A whole tag, allowing ">" inside quoted attribute values
+TAG_PATTERN = re.compile(r"""<[A-Za-z/!?][^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*>""")
+TAG_NAME_PATTERN = re.compile(r"<([A-Za-z][\w-]*)")
+# Past this, a "<" still waiting for its ">" is taken to be plain text
+MAX_TAG_LENGTH = 16 * 1024
+
+
+class HTMLMinifier:
+    """Incremental HTML minifier: feed it chunks, get minified chunks back.
+
+    Comments are dropped and every run of whitespace in text collapses to a
+    single space (none at the start or end of the document). Tags are kept
+    as written, and the content of pre, code, textarea, script and style
+    elements is left exactly as it is. Only as much input as could still
+    change meaning (an unfinished tag, comment or whitespace run) is held
+    back between chunks.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.raw_end = None
+        self.space = False
+        self.started = False
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        return self._drain(final=False)
+
+    def close(self):
+        return self._drain(final=True)
+
+    def _emit(self, out, text):
+        if not text:
+            return
+        if self.space and self.started:
+            out.append(" ")
+        self.space = False
+        self.started = True
+        out.append(text)
+
+    def _drain(self, final):
+        out = []
+        buffer = self.buffer
+        pos = 0
+        while pos < len(buffer):
+            if self.raw_end is not None:
+                end = self.raw_end.search(buffer, pos)
+                if end is None:
+                    if final:
+                        self._emit(out, buffer[pos:])
+                        pos = len(buffer)
+                        break
+                    # Hold back what might be the start of the closing tag
+                    keep = max(pos, len(buffer) - len(self.raw_end.pattern))
+                    self._emit(out, buffer[pos:keep])
+                    pos = keep
+                    break
+                self._emit(out, buffer[pos:end.start()])
+                self.raw_end = None
+                pos = end.start()
+                continue
+
+            token = TOKEN_PATTERN.search(buffer, pos)
+            if token is None:
+                # A trailing "<" may turn out to open a tag
+                end = len(buffer) - 1 if not final and buffer.endswith("<") else len(buffer)
+                self._emit(out, buffer[pos:end])
+                pos = end
+                break
+            self._emit(out, buffer[pos:token.start()])
+            pos = token.start()
+
+            text = token.group()
+            if text == "<!--":
+                end = buffer.find("-->", token.end())
+                if end == -1:
+                    if not final:
+                        break
+                    pos = len(buffer)
+                else:
+                    pos = end + 3
+            elif text.startswith("<"):
+                tag = TAG_PATTERN.match(buffer, pos)
+                if tag is None:
+                    if not final and len(buffer) - pos < MAX_TAG_LENGTH:
+                        break
+                    # Not a tag after all
+                    self._emit(out, "<")
+                    pos += 1
+                    continue
+                self._emit(out, tag.group())
+                pos = tag.end()
+                name = TAG_NAME_PATTERN.match(tag.group())
+                if name and name.group(1).lower() in RAW_TAGS and not tag.group().endswith("/>"):
+                    self.raw_end = re.compile(f"</{name.group(1)}", re.IGNORECASE)
+            else:
+                # A run carrying on into the next chunk just sets the same flag again
+                self.space = True
+                pos = token.end()
+
+        self.buffer = buffer[pos:]
+        return "".join(out)
+
+
+def minify_chunks(chunks):
+    """Minify an iterable of HTML chunks, yielding minified chunks as they're ready."""
+    minifier = HTMLMinifier()
+    for chunk in chunks:
+        output = minifier.feed(chunk)
+        if output:
+            yield output
+    output = minifier.close()
+    if output:
+        yield output
+
+
+def minify(html):
+    return "".join(minify_chunks([html]))
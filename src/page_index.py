@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from extract_title import front_matter_title, heading_title
+from front_matter import split_front_matter_lines
+from generate_pages_recursive import collect_pages
+from markdown_to_blocks import BlockType, parse_blocks
+from search_index import page_url
+
+INDEX_VERSION = 1
+PAGE_INDEX_PATH = os.path.join(".cache", "page-index.json")
+WORD_PATTERN = re.compile(r"\w+")
+# Link and image targets aren't words of the page
+LINK_TARGET_PATTERN = re.compile(r"\]\([^)]*\)")
+
+
+def read_page_metadata(path):
+    """Title, date, tags, word count and source hash of a page, in one pass over the file.
+
+    The title is the one the page is rendered with: the front matter's, else
+    the first h1. Words in code blocks aren't counted.
+    """
+    digest = hashlib.sha256()
+
+    def lines():
+        with open(path, 'rb') as f:
+            for line in f:
+                digest.update(line)
+                yield line.decode('utf-8').rstrip("\r\n")
+
+    fields, body = split_front_matter_lines(lines())
+    title = front_matter_title(fields)
+    words = 0
+    for block_type, block in parse_blocks(body):
+        if block_type == BlockType.CODE:
+            continue
+        if title is None:
+            title = heading_title(block_type, block)
+        for line in block:
+            words += len(WORD_PATTERN.findall(LINK_TARGET_PATTERN.sub("]", line)))
+
+    tags = fields.get("tags", [])
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    date = fields.get("date")
+    return {
+        "title": title,
+        "date": date if isinstance(date, str) and date else None,
+        "tags": tags,
+        "words": words,
+        "source_hash": digest.hexdigest(),
+    }
+
+
+class PageIndex:
+    """Metadata of every page under the content directory, kept between builds.
+
+    Pages are keyed by their source path. The build brings the index up to
+    date from the pages it walks anyway, reading only those it regenerates
+    or that the index hasn't seen, so listing pages (say, every post under
+    blog/ for an index page) never renders anything. An entry is also reused
+    while the source's mtime and size are unchanged. A loaded index only
+    reads its file once its pages are needed.
+    """
+
+    def __init__(self, path, pages=None):
+        self.path = path
+        # source path: {"url", "title", "date", "tags", "words", "source_hash", "mtime_ns", "size"}
+        self._pages = pages if pages is not None else {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        index = cls(path)
+        index._pages = None
+        return index
+
+    @property
+    def pages(self):
+        if self._pages is None:
+            self._pages = self._read()
+        return self._pages
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("pages", {})
+
+    def stamp(self):
+        """[mtime_ns, size] of the saved index, or None if there is none."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def save(self):
+        if not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "pages": self.pages}, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def __contains__(self, source_path):
+        return source_path in self.pages
+
+    def update(self, pages):
+        """Bring the entries of pages, (source path, url) pairs, up to date; returns the source paths read again."""
+        read = []
+        for source, url in pages:
+            stat = os.stat(source)
+            entry = self.pages.get(source)
+            if (entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+                    and entry["url"] == url):
+                continue
+            metadata = read_page_metadata(source)
+            metadata.update(url=url, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            read.append(source)
+            if metadata != entry:
+                self.pages[source] = metadata
+                self.dirty = True
+        return read
+
+    def retain(self, source_paths):
+        """Drop the pages that are not in source_paths."""
+        keep = set(source_paths)
+        for source in [source for source in self.pages if source not in keep]:
+            del self.pages[source]
+            self.dirty = True
+
+    def scan(self, content_dir):
+        """Update the index from every page under content_dir, without a build."""
+        pages = collect_pages(content_dir, os.sep)
+        read = self.update((source, page_url(dest, os.sep)) for source, dest in pages)
+        self.retain(source for source, _ in pages)
+        return read
+
+    def list(self, prefix="/"):
+        """Entries of the pages whose URL starts with prefix, newest first, undated ones last by URL."""
+        entries = [entry for entry in self.pages.values() if entry["url"].startswith(prefix)]
+        entries.sort(key=lambda entry: entry["url"])
+        entries.sort(key=lambda entry: entry["date"] or "", reverse=True)
+        return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the site's pages from the page index, without rendering them.")
+    parser.add_argument("prefix", nargs="?", default="/", help="only list pages whose URL starts with this, e.g. /blog/")
+    parser.add_argument("--json", action="store_true", help="print the entries as JSON")
+    args = parser.parse_args()
+
+    index = PageIndex.load(PAGE_INDEX_PATH)
+    index.scan("content")
+    index.save()
+    entries = index.list(args.prefix)
+    if args.json:
+        print(json.dumps(entries, indent=2, ensure_ascii=False))
+        return
+    for entry in entries:
+        tags = f"  [{', '.join(entry['tags'])}]" if entry["tags"] else ""
+        print(f"{entry['date'] or '':<12}{entry['url']:<40}{entry['title'] or ''} ({entry['words']} words){tags}")
+
+if __name__ == "__main__":
+    main()
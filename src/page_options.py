@@ -0,0 +1,41 @@
+import copy
+from render_context import RenderContext
+
+
+class PageOptions:
+    """The settings every page of a build is generated with.
+
+    Handed in one piece from generate_pages_recursive down to the pipelines,
+    worker processes included, so a new setting is one more attribute here
+    instead of one more positional argument at every level.
+
+    context is the RenderContext (basepath, fingerprinted assets, image
+    sizes); minify strips comments and whitespace from the output;
+    cache_path is the block cache file, or None to render every block;
+    collect_metrics and collect_text gather a PageMetrics and a
+    search_index.PageText for each page.
+    """
+
+    def __init__(self, basepath="/", assets=None, images=None, minify=False, cache_path=None,
+                 collect_metrics=False, collect_text=False):
+        self.context = RenderContext(basepath, assets, images)
+        self.minify = minify
+        self.cache_path = cache_path
+        self.collect_metrics = collect_metrics
+        self.collect_text = collect_text
+
+    @property
+    def basepath(self):
+        return self.context.basepath
+
+    def replace(self, **changes):
+        """A copy with some settings changed."""
+        options = copy.copy(self)
+        for name, value in changes.items():
+            if not hasattr(options, name):
+                raise TypeError(f"Unknown page option: {name}")
+            setattr(options, name, value)
+        return options
+
+
+DEFAULT_OPTIONS = PageOptions()
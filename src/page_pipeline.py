@@ -0,0 +1,78 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from block_cache import open_cache
+from generate_page import read_page, render_page, write_page
+from metrics import NO_METRICS, PageMetrics
+from page_options import DEFAULT_OPTIONS
+from search_index import PageText
+from template import load_template
+
+# Threads doing file reads and writes; plenty, since they mostly wait on the disk
+IO_WORKERS = 8
+# How many pages may be read ahead of rendering, and rendered ahead of being written
+QUEUE_SIZE = 16
+
+
+async def run_pipeline(pages, template_path, options=DEFAULT_OPTIONS, on_done=None, io_workers=IO_WORKERS, queue_size=QUEUE_SIZE):
+    """Generate pages with reads and writes on I/O threads while this thread renders.
+
+    Three stages joined by bounded queues: a reader starting file reads on
+    the I/O executor, a renderer parsing each source (see render_page) and
+    handing the executor a write that streams the page through the template
+    into its file, and a finisher waiting for writes and calling
+    on_done in the original page order, with the page metrics, whether the
+    output was added, changed or left as it was, and with
+    options.collect_text, the page's PageText for the search index.
+    """
+    loop = asyncio.get_running_loop()
+    context = options.context
+    block_cache = open_cache(options.cache_path) if options.cache_path else None
+    # Loaded once up front: a stat per page from this thread would wait on the GIL behind the I/O threads
+    template = load_template(template_path, context)
+    executor = ThreadPoolExecutor(max_workers=io_workers)
+    reads = asyncio.Queue(queue_size)
+    writes = asyncio.Queue(queue_size)
+
+    async def read_all():
+        for content_path, html_dest_path in pages:
+            page_metrics = PageMetrics(content_path, html_dest_path) if options.collect_metrics else NO_METRICS
+            text = PageText() if options.collect_text else None
+            read = loop.run_in_executor(executor, read_page, content_path, page_metrics)
+            await reads.put((content_path, html_dest_path, page_metrics, text, read))
+        await reads.put(None)
+
+    async def render_all():
+        while (item := await reads.get()) is not None:
+            content_path, html_dest_path, page_metrics, text, read = item
+            try:
+                markdown = await read
+                print(f"Generating page from {content_path} to {html_dest_path} using {template_path}")
+                title, content = render_page(content_path, markdown, context, page_metrics, block_cache, text)
+                write = loop.run_in_executor(executor, write_page, template, title, content, html_dest_path, page_metrics,
+                                             options.minify)
+            except Exception as e:
+                raise Exception(f"Failed to generate page from {content_path}: {e}") from e
+            await writes.put((content_path, html_dest_path, page_metrics, text, write))
+        await writes.put(None)
+
+    async def finish_all():
+        while (item := await writes.get()) is not None:
+            content_path, html_dest_path, page_metrics, text, write = item
+            try:
+                change = await write
+            except Exception as e:
+                raise Exception(f"Failed to generate page from {content_path}: {e}") from e
+            if on_done:
+                on_done(content_path, html_dest_path, page_metrics.to_dict() if options.collect_metrics else None, change, text)
+
+    tasks = [asyncio.create_task(stage()) for stage in (read_all, render_all, finish_all)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def generate_pages_pipelined(pages, template_path, options=DEFAULT_OPTIONS, on_done=None):
+    asyncio.run(run_pipeline(pages, template_path, options, on_done))
@@ -0,0 +1,150 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from build_changes import REMOVED, write_if_changed
+
+try:
+    from compression.zstd import compress as zstd_compress  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard
+    except ImportError:
+        zstd_compress = None
+    else:
+        def zstd_compress(data, level=19):
+            return zstandard.ZstdCompressor(level=level).compress(data)
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt")
+# Below this, the saved bytes aren't worth a second file and a lookup on the host
+MIN_SIZE = 1024
+
+GZIP = ".gz"
+ZSTD = ".zst"
+
+
+def gzip_compress(data):
+    # mtime=0 keeps the output byte-identical across builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+COMPRESSORS = {GZIP: gzip_compress}
+if zstd_compress is not None:
+    COMPRESSORS[ZSTD] = zstd_compress
+
+
+def remove_sibling(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return None
+    return REMOVED
+
+
+def precompress_file(path, suffixes, min_size=MIN_SIZE):
+    """Bring the compressed siblings of path up to date.
+
+    A sibling is up to date when its mtime equals the file's, which it is
+    given on every write. Siblings of files below min_size, or that would
+    not be smaller than the file, are removed. Returns (sibling, change)
+    pairs for the siblings written or removed.
+    """
+    stat = os.stat(path)
+    results = []
+    data = None
+    for suffix in suffixes:
+        sibling = path + suffix
+        if stat.st_size < min_size:
+            results.append((sibling, remove_sibling(sibling)))
+            continue
+        try:
+            if os.stat(sibling).st_mtime_ns == stat.st_mtime_ns:
+                continue
+        except FileNotFoundError:
+            pass
+
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        compressed = COMPRESSORS[suffix](data)
+        if len(compressed) >= len(data):
+            results.append((sibling, remove_sibling(sibling)))
+            continue
+        change = write_if_changed(sibling, compressed)
+        os.utime(sibling, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        results.append((sibling, change))
+    return [(sibling, change) for sibling, change in results if change is not None]
+
+
+def list_outputs(root, suffixes, keep=()):
+    """Split the files under root into compressible ones and orphaned siblings,
+    whose file is gone. Paths in keep (e.g. copied static files) are never orphans.
+    """
+    files = []
+    orphans = []
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                    continue
+                path = entry.path
+                if path.endswith(COMPRESSIBLE_EXTENSIONS):
+                    files.append(path)
+                    continue
+                for suffix in suffixes:
+                    if not path.endswith(suffix) or path in keep:
+                        continue
+                    base = path[:-len(suffix)]
+                    if base.endswith(COMPRESSIBLE_EXTENSIONS) and not os.path.exists(base):
+                        orphans.append(path)
+    return sorted(files), sorted(orphans)
+
+
+def remove_precompressed(root, suffixes, changes=None, keep=()):
+    """Delete the compressed siblings under root with one of suffixes, e.g. once
+    a build no longer precompresses, so none are left behind to go stale.
+    Paths in keep (e.g. copied static files) are left alone.
+    """
+    files, orphans = list_outputs(root, suffixes, keep)
+    siblings = [path + suffix for path in files for suffix in suffixes if path + suffix not in keep]
+    removed = [sibling for sibling in orphans + siblings if remove_sibling(sibling)]
+    if changes is not None:
+        changes.record_removed(removed)
+    print(f"{len(removed)} compressed files removed")
+    return removed
+
+
+def precompress_directory(root, suffixes=(GZIP,), min_size=MIN_SIZE, workers=None, changes=None, keep=()):
+    """Write compressed siblings (index.html.gz, ...) next to every compressible file under root.
+
+    zlib and zstd release the GIL while compressing, so a thread pool is
+    enough to use several cores; it has one thread per CPU unless workers
+    says otherwise.
+    """
+    for suffix in suffixes:
+        if suffix not in COMPRESSORS:
+            raise ValueError(f"No compressor available for {suffix}")
+
+    files, orphans = list_outputs(root, suffixes, keep)
+    with ThreadPoolExecutor(max_workers=max(1, workers or os.cpu_count() or 1)) as executor:
+        results = [
+            result
+            for file_results in executor.map(lambda path: precompress_file(path, suffixes, min_size), files)
+            for result in file_results
+        ]
+    for orphan in orphans:
+        if remove_sibling(orphan):
+            results.append((orphan, REMOVED))
+
+    written = removed = 0
+    for sibling, change in results:
+        if change == REMOVED:
+            removed += 1
+        else:
+            written += 1
+        if changes is not None:
+            changes.record(sibling, change)
+
+    print(f"{written} compressed files written, {removed} removed")
+    return results
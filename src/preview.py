@@ -0,0 +1,162 @@
+import argparse
+import functools
+import http.server
+import os
+import posixpath
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from generate_page import read_page, render_page
+from render_context import RenderContext
+from template import load_template
+
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+
+
+def source_for(url_path, content_dir, basepath="/"):
+    """Map a request path to the markdown file its page is built from, or None.
+
+    Follows the build's layout: content/blog/tom/index.md is served at
+    /blog/tom/ (and /blog/tom, /blog/tom/index.html), content/about.md at
+    /about.html (and /about).
+    """
+    path = urllib.parse.unquote(urllib.parse.urlsplit(url_path).path)
+    if path + "/" == basepath:
+        path = basepath
+    if not path.startswith(basepath):
+        return None
+    # Rooted, so ".." can't climb out of the content directory
+    rel_path = posixpath.normpath("/" + path[len(basepath):]).lstrip("/")
+
+    if rel_path == "" or rel_path == "index.html":
+        candidates = ["index.md"]
+    elif rel_path.endswith(".html"):
+        candidates = [rel_path[:-len("html")] + "md"]
+    else:
+        candidates = [rel_path + "/index.md", rel_path + ".md"]
+
+    for candidate in candidates:
+        source = os.path.join(content_dir, *candidate.split("/"))
+        if os.path.isfile(source):
+            return source
+    return None
+
+
+class PreviewRenderer:
+    """Renders pages on request and keeps the HTML in memory, least recently
+    used first out past max_bytes.
+
+    An entry is reused while its source's mtime and size, and the template,
+    are unchanged, so edits show up on the next request without a rebuild.
+    """
+
+    def __init__(self, template_path, basepath="/", max_bytes=DEFAULT_CACHE_SIZE):
+        self.template_path = template_path
+        self.context = RenderContext(basepath)
+        self.max_bytes = max_bytes
+        self.size = 0
+        # source path: ((mtime_ns, size, template digest), html bytes)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def render(self, source):
+        stat = os.stat(source)
+        template = load_template(self.template_path, self.context)
+        stamp = (stat.st_mtime_ns, stat.st_size, template.digest)
+        with self.lock:
+            entry = self.entries.get(source)
+            if entry is not None and entry[0] == stamp:
+                self.entries.move_to_end(source)
+                return entry[1]
+
+        start = time.perf_counter()
+        title, content = render_page(source, read_page(source), self.context)
+        body = template.render(Title=title, Content=content).encode('utf-8')
+        print(f"Rendered {source} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        with self.lock:
+            old = self.entries.pop(source, None)
+            if old is not None:
+                self.size -= len(old[1])
+            if len(body) <= self.max_bytes:
+                self.entries[source] = (stamp, body)
+                self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+        return body
+
+
+class PreviewHandler(http.server.SimpleHTTPRequestHandler):
+    renderer = None
+    content_dir = "content"
+    basepath = "/"
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def handle_request(self, send_body):
+        source = source_for(self.path, self.content_dir, self.basepath)
+        if source is not None:
+            try:
+                body = self.renderer.render(source)
+            except Exception as e:
+                self.send_error(500, f"Failed to render {source}: {e}")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+            return
+
+        # Everything else comes straight from the static directory
+        if not self.path.startswith(self.basepath):
+            self.send_error(404)
+            return
+        self.path = "/" + self.path[len(self.basepath):]
+        if send_body:
+            super().do_GET()
+        else:
+            super().do_HEAD()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(content_dir, static_dir, template_path, port, basepath="/", max_bytes=DEFAULT_CACHE_SIZE):
+    renderer = PreviewRenderer(template_path, basepath, max_bytes)
+    handler = functools.partial(PreviewHandler, directory=static_dir)
+    PreviewHandler.renderer = renderer
+    PreviewHandler.content_dir = content_dir
+    PreviewHandler.basepath = basepath
+    server = http.server.ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the site, rendering pages from content/ as they are requested.")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served from")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE // (1024 * 1024), metavar="MB",
+                        help="memory kept for rendered pages")
+    args = parser.parse_args()
+
+    server = serve("content", "static", "template.html", args.port, args.basepath, args.cache_size * 1024 * 1024)
+    print(f"Previewing content on http://localhost:{args.port}{args.basepath}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import hashlib
+import re
+
+URL_PATH_PATTERN = re.compile(r"[^?#]*")
+
+
+class RenderContext:
+    """Site-wide settings that change how nodes and templates are rendered.
+
+    assets maps site-absolute asset paths to the fingerprinted paths they
+    were published under, e.g. {"/index.css": "/index.1a2b3c4d.css"}.
+    images maps site-absolute image paths to their (width, height); when
+    given, images are rendered with their size and lazy loading.
+    assets_digest covers both, as pages depend on either.
+    """
+
+    def __init__(self, basepath="/", assets=None, images=None):
+        self.basepath = basepath
+        self.assets = assets or {}
+        self.images = images
+        if self.assets or images is not None:
+            pairs = [f"{path}\0{self.assets[path]}" for path in sorted(self.assets)]
+            if images is not None:
+                pairs.append("images")
+                pairs.extend(f"{path}\0{images[path][0]}x{images[path][1]}" for path in sorted(images))
+            self.assets_digest = hashlib.sha256("\0".join(pairs).encode('utf-8')).hexdigest()
+        else:
+            self.assets_digest = None
+
+    @property
+    def key(self):
+        if self.assets_digest is None:
+            return (self.basepath,)
+        return (self.basepath, self.assets_digest)
+
+    def image_size(self, url):
+        if not self.images:
+            return None
+        return self.images.get(URL_PATH_PATTERN.match(url).group())
+
+    def url(self, url):
+        if self.assets:
+            path = URL_PATH_PATTERN.match(url).group()
+            if path in self.assets:
+                url = self.assets[path] + url[len(path):]
+        # Only site-absolute paths move under the basepath; "//host/..." is protocol-relative
+        if self.basepath == "/" or not url.startswith("/") or url.startswith("//"):
+            return url
+        return self.basepath + url[1:]
+
+
+DEFAULT_CONTEXT = RenderContext()
@@ -0,0 +1,236 @@
+import heapq
+import json
+import os
+import re
+import string
+from collections import Counter
+from build_changes import REMOVED, write_if_changed
+from render_context import RenderContext
+
+SEARCH_DIR = "search"
+PAGES_FILE = "pages.json"
+# Terms are sharded by their first PREFIX_LENGTH characters
+PREFIX_LENGTH = 2
+MAX_TERM_LENGTH = 40
+TERM_PATTERN = re.compile(r"\w+")
+SHARD_NAME_CHARS = set(string.ascii_lowercase + string.digits)
+INDEX_VERSION = 1
+
+
+def tokenize(text):
+    for match in TERM_PATTERN.finditer(text.casefold()):
+        term = match.group()
+        if 2 <= len(term) <= MAX_TERM_LENGTH:
+            yield term
+
+
+def shard_name(prefix):
+    """File name of the shard for a term prefix: a-z and 0-9 as they are, anything else as _<hex>_."""
+    return "".join(char if char in SHARD_NAME_CHARS else f"_{ord(char):x}_" for char in prefix) + ".json"
+
+
+def page_url(dest_path, dest_root, basepath="/"):
+    rel_path = os.path.relpath(dest_path, dest_root).replace(os.sep, "/")
+    if rel_path == "index.html":
+        rel_path = ""
+    elif rel_path.endswith("/index.html"):
+        rel_path = rel_path[:-len("index.html")]
+    return RenderContext(basepath).url("/" + rel_path)
+
+
+class PageText:
+    """Term counts of a page's plain text, gathered block by block while it renders."""
+
+    def __init__(self):
+        self.title = None
+        self.terms = Counter()
+
+    def add(self, text):
+        self.terms.update(tokenize(text))
+
+
+class SearchIndex:
+    """Inverted index over the site's pages, written as prefix-sharded JSON.
+
+    The output directory holds pages.json, {"prefix_length": n, "pages":
+    [[url, title], ...]}, and one shard per term prefix mapping each term to
+    [[page id, count], ...], most frequent first; a page's id is its position
+    in pages. A client fetches pages.json and only the shards of the terms it
+    looks up.
+
+    Each page's terms are kept in a file of their own between builds, and a
+    page keeps its id, so a build only rewrites the shards whose terms
+    changed, plus any missing from the output. New pages get their ids in
+    order of their output path when the index is written or saved, so the
+    ids don't depend on the order pages finished rendering in. The prefixes of changed terms
+    are saved too until their shards are written, so the state can be saved
+    along with the build manifest even if the build then fails.
+
+    The names of the files written are kept as well, and only those are ever
+    deleted, so anything else in the output's search directory (e.g. static
+    files synced there) is left alone.
+    """
+
+    def __init__(self, path, pages=None, dirty_prefixes=(), files=()):
+        self.path = path
+        # dest path: {"id", "url", "title", "terms": {term: count}}
+        self.pages = pages if pages is not None else {}
+        # Ids of removed pages are handed out again before new ones
+        used = {page["id"] for page in self.pages.values()}
+        self.next_id = max(used, default=-1) + 1
+        self.free_ids = [i for i in range(self.next_id) if i not in used]
+        # Dest paths of pages added since ids were last assigned
+        self.new_pages = set()
+        self.dirty_prefixes = set(dirty_prefixes)
+        # Names of the files under the search directory the last write produced
+        self.files = set(files)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != INDEX_VERSION:
+            return cls(path)
+        pages = data.get("pages", {})
+        files = data.get("files")
+        if files is None:
+            # Saved before the names were kept: what a write of these pages produced
+            files = {shard_name(term[:PREFIX_LENGTH]) for page in pages.values() for term in page["terms"]} | {PAGES_FILE}
+        return cls(path, pages, data.get("dirty", ()), files)
+
+    def save(self):
+        self._assign_ids()
+        if not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            data = {"version": INDEX_VERSION, "pages": self.pages, "dirty": sorted(self.dirty_prefixes), "files": sorted(self.files)}
+            json.dump(data, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def __contains__(self, dest_path):
+        return dest_path in self.pages
+
+    def _touch(self, terms):
+        self.dirty_prefixes.update(term[:PREFIX_LENGTH] for term in terms)
+        self.dirty = True
+
+    def update(self, dest_path, url, text):
+        old = self.pages.get(dest_path)
+        terms = dict(text.terms)
+        if old is not None:
+            if old["url"] == url and old["title"] == text.title and old["terms"] == terms:
+                return
+            page_id = old["id"]
+            changed = {term for term in old["terms"].keys() | terms.keys() if old["terms"].get(term) != terms.get(term)}
+            if old["url"] != url or old["title"] != text.title:
+                # pages.json changes, but no shard does
+                self.dirty = True
+            self._touch(changed)
+        else:
+            page_id = None
+            self.new_pages.add(dest_path)
+            self._touch(terms)
+        self.pages[dest_path] = {"id": page_id, "url": url, "title": text.title, "terms": terms}
+
+    def retain(self, dest_paths):
+        """Drop the pages that are not in dest_paths."""
+        keep = set(dest_paths)
+        for dest_path in [path for path in self.pages if path not in keep]:
+            page = self.pages.pop(dest_path)
+            if page["id"] is None:
+                self.new_pages.discard(dest_path)
+            else:
+                heapq.heappush(self.free_ids, page["id"])
+            self._touch(page["terms"])
+
+    def _assign_ids(self):
+        for dest_path in sorted(self.new_pages):
+            if self.free_ids:
+                page_id = heapq.heappop(self.free_ids)
+            else:
+                page_id = self.next_id
+                self.next_id += 1
+            self.pages[dest_path]["id"] = page_id
+        self.new_pages.clear()
+
+    def write(self, dest_root, changes=None):
+        """Write pages.json and the shards that changed under dest_root/search."""
+        directory = os.path.join(dest_root, SEARCH_DIR)
+        os.makedirs(directory, exist_ok=True)
+        self._assign_ids()
+
+        postings = {}
+        for page in self.pages.values():
+            for term, count in page["terms"].items():
+                postings.setdefault(term[:PREFIX_LENGTH], {}).setdefault(term, []).append([page["id"], count])
+
+        expected = {shard_name(prefix): prefix for prefix in postings}
+        expected_files = set(expected) | {PAGES_FILE}
+        with os.scandir(directory) as entries:
+            existing = {entry.name for entry in entries if entry.is_file()}
+
+        pages = [None] * self.next_id
+        for page in self.pages.values():
+            pages[page["id"]] = [page["url"], page["title"]]
+        path = os.path.join(directory, PAGES_FILE)
+        data = json.dumps({"prefix_length": PREFIX_LENGTH, "pages": pages}, separators=(",", ":"), ensure_ascii=False)
+        results = [(path, write_if_changed(path, data.encode('utf-8')))]
+
+        for name, prefix in sorted(expected.items()):
+            if prefix not in self.dirty_prefixes and name in existing:
+                continue
+            shard = {
+                term: sorted(entries, key=lambda entry: (-entry[1], entry[0]))
+                for term, entries in sorted(postings[prefix].items())
+            }
+            path = os.path.join(directory, name)
+            data = json.dumps(shard, separators=(",", ":"), ensure_ascii=False)
+            results.append((path, write_if_changed(path, data.encode('utf-8'))))
+
+        # Only files an earlier write produced; precompressed siblings are left to precompress_directory
+        for name in sorted((self.files & existing) - expected_files):
+            path = os.path.join(directory, name)
+            os.remove(path)
+            results.append((path, REMOVED))
+
+        if self.dirty_prefixes or self.files != expected_files:
+            self.dirty_prefixes.clear()
+            self.files = expected_files
+            self.dirty = True
+        if changes is not None:
+            for path, change in results:
+                changes.record(path, change)
+        written = sum(1 for _, change in results if change is not None and change != REMOVED)
+        removed = sum(1 for _, change in results if change == REMOVED)
+        print(f"Search index: {len(self.pages)} pages, {written} files written, {removed} removed")
+        return results
+
+
+def remove_search_index(dest_root, path):
+    """Delete the files and saved state of a search index a previous build wrote."""
+    if not os.path.exists(path):
+        return []
+    index = SearchIndex.load(path)
+    directory = os.path.join(dest_root, SEARCH_DIR)
+    removed = []
+    for name in sorted(index.files):
+        file_path = os.path.join(directory, name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            removed.append(file_path)
+    os.remove(path)
+    try:
+        os.rmdir(directory)
+    except OSError:
+        # Missing, or holding files that aren't the index's
+        pass
+    return removed
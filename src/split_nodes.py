@@ -1,5 +1,5 @@
 from textnode import TextNode, TextType
-from extract_markdown import extract_markdown_images, extract_markdown_links
+from extract_markdown import IMAGE_PATTERN, LINK_PATTERN
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
@@ -27,29 +27,24 @@ def split_nodes_image(old_nodes):
             continue
         
         text = old_node.text
-        images = extract_markdown_images(text)
+        matches = list(IMAGE_PATTERN.finditer(text))
         
-        if not images:
+        if not matches:
             new_nodes.append(old_node)
             continue
         
-        remaining_text = text
-        for alt_text, url in images:
-            image_markdown = f"![{alt_text}]({url})"
+        # Slice around each match in place so many matches stay linear
+        position = 0
+        for match in matches:
+            if match.start() > position:
+                new_nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
             
-            index = remaining_text.find(image_markdown)
-            if index == -1:
-                continue
+            new_nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
             
-            if index > 0:
-                new_nodes.append(TextNode(remaining_text[:index], TextType.TEXT))
-            
-            new_nodes.append(TextNode(alt_text, TextType.IMAGE, url))
-            
-            remaining_text = remaining_text[index + len(image_markdown):]
+            position = match.end()
         
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.TEXT))
+        if position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
     
     return new_nodes
 
@@ -62,28 +57,22 @@ def split_nodes_link(old_nodes):
             continue
         
         text = old_node.text
-        links = extract_markdown_links(text)
+        matches = list(LINK_PATTERN.finditer(text))
         
-        if not links:
+        if not matches:
             new_nodes.append(old_node)
             continue
         
-        remaining_text = text
-        for link_text, url in links:
-            link_markdown = f"[{link_text}]({url})"
-            
-            index = remaining_text.find(link_markdown)
-            if index == -1:
-                continue
-            
-            if index > 0:
-                new_nodes.append(TextNode(remaining_text[:index], TextType.TEXT))
+        position = 0
+        for match in matches:
+            if match.start() > position:
+                new_nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
             
-            new_nodes.append(TextNode(link_text, TextType.LINK, url))
+            new_nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
             
-            remaining_text = remaining_text[index + len(link_markdown):]
+            position = match.end()
         
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.TEXT))
+        if position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
     
     return new_nodes
@@ -0,0 +1,283 @@
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from build_changes import ADDED, CHANGED, REMOVED, write_if_changed
+from build_manifest import hash_file
+
+# Fetched by well-known names, so never fingerprinted
+UNFINGERPRINTED_EXTENSIONS = (".html", ".htm", ".txt", ".xml", ".ico", ".webmanifest")
+FINGERPRINT_LENGTH = 8
+HEADERS_FILE = "_headers"
+HEADERS_COMMENT = "# Written by the site build for fingerprinted assets"
+IMMUTABLE = "Cache-Control: public, max-age=31536000, immutable"
+# Copies mostly wait on the disk, so more threads than cores pay off
+COPY_WORKERS = 8
+COPY_BATCH = 32
+# Linux ioctl that makes dst share src's blocks (btrfs, XFS, ...)
+FICLONE = 0x40049409
+# Errors meaning "not here": fall back to the next way of copying
+UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL, errno.ENOTTY, errno.EBADF, errno.EPERM}
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def list_files(root, prefix=""):
+    files = []
+    with os.scandir(os.path.join(root, prefix)) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+
+    for entry in entries:
+        rel_path = os.path.join(prefix, entry.name)
+        if entry.is_dir():
+            files.extend(list_files(root, rel_path))
+        else:
+            files.append(rel_path)
+    return files
+
+
+def needs_copy(src_path, dst_path, src_stat, dst_stat, use_hash=False):
+    if src_stat.st_size != dst_stat.st_size:
+        return True
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns and not use_hash:
+        return False
+
+    if hash_file(src_path) != hash_file(dst_path):
+        return True
+    # Same bytes, different mtime: don't rewrite the file, just line the mtimes
+    # up so the next sync takes the fast path
+    if src_stat.st_mtime_ns != dst_stat.st_mtime_ns:
+        shutil.copystat(src_path, dst_path)
+    return False
+
+
+def _clone(src_fd, dst_fd, size):
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError as e:
+        if e.errno in UNSUPPORTED:
+            return False
+        raise
+    return True
+
+
+def _copy_in_kernel(copy, src_fd, dst_fd, size):
+    # Only give up on a method before it has copied anything
+    copied = 0
+    while copied < size:
+        try:
+            n = copy(src_fd, dst_fd, copied, size - copied)
+        except OSError as e:
+            if copied == 0 and e.errno in UNSUPPORTED:
+                return False
+            raise
+        if n == 0:
+            break
+        copied += n
+    return True
+
+
+def _copy_file_range(src_fd, dst_fd, size):
+    if not hasattr(os, "copy_file_range"):
+        return False
+    return _copy_in_kernel(
+        lambda src_fd, dst_fd, offset, count: os.copy_file_range(src_fd, dst_fd, count, offset, offset),
+        src_fd, dst_fd, size,
+    )
+
+
+def _sendfile(src_fd, dst_fd, size):
+    if not hasattr(os, "sendfile"):
+        return False
+    return _copy_in_kernel(
+        lambda src_fd, dst_fd, offset, count: os.sendfile(dst_fd, src_fd, offset, count),
+        src_fd, dst_fd, size,
+    )
+
+
+COPY_METHODS = (("reflink", _clone), ("copy_file_range", _copy_file_range), ("sendfile", _sendfile))
+
+
+def copy_file(src_path, dst_path, link=False, replace=True):
+    """Copy src_path over dst_path with its metadata, as cheaply as the filesystem allows.
+
+    With link, dst_path becomes a hard link to src_path where possible.
+    Otherwise the data is reflinked, or copied in the kernel with
+    copy_file_range or sendfile, before falling back to reading and
+    writing. An existing dst_path is replaced in one step, so it is never
+    seen half written; pass replace=False when there is none, to write it
+    in place. Returns the method used.
+    """
+    tmp_path = dst_path + ".tmp" if replace or link else dst_path
+    if link:
+        try:
+            os.link(src_path, tmp_path)
+        except FileExistsError:
+            os.remove(tmp_path)
+            os.link(src_path, tmp_path)
+        except OSError:
+            # Different filesystem, or no hard links there
+            link = False
+        else:
+            os.replace(tmp_path, dst_path)
+            return "link"
+
+    try:
+        with open(src_path, 'rb') as fsrc, open(tmp_path, 'wb') as fdst:
+            size = os.fstat(fsrc.fileno()).st_size
+            for method, copy in COPY_METHODS:
+                if copy(fsrc.fileno(), fdst.fileno(), size):
+                    break
+            else:
+                method = "read"
+                shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+        shutil.copystat(src_path, tmp_path)
+        if tmp_path != dst_path:
+            os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return method
+
+
+def fingerprint_assets(src, manifest):
+    """Map each file under src to its fingerprinted name, e.g. "index.css" -> "index.1a2b3c4d.css"."""
+    names = {}
+    src_paths = []
+    for rel_path in list_files(src):
+        root, ext = os.path.splitext(rel_path)
+        if ext.lower() in UNFINGERPRINTED_EXTENSIONS or os.path.basename(rel_path) == HEADERS_FILE:
+            continue
+        src_path = os.path.join(src, rel_path)
+        src_paths.append(src_path)
+        names[rel_path] = f"{root}.{manifest.file_hash(src_path)[:FINGERPRINT_LENGTH]}{ext}"
+    manifest.retain_hashes(src_paths, src)
+    return names
+
+
+def asset_urls(names):
+    """Turn fingerprint_assets() names into the site-absolute URL map RenderContext takes."""
+    return {
+        "/" + rel_path.replace(os.sep, "/"): "/" + name.replace(os.sep, "/")
+        for rel_path, name in names.items()
+    }
+
+
+def write_asset_headers(dst, urls, context):
+    """Write a _headers file marking fingerprinted assets immutable, or remove one
+    a previous fingerprinting build left behind when urls is empty.
+    """
+    path = os.path.join(dst, HEADERS_FILE)
+    if not urls:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                ours = f.readline().rstrip("\n") == HEADERS_COMMENT
+        except FileNotFoundError:
+            return None
+        if not ours:
+            return None
+        os.remove(path)
+        return REMOVED
+
+    lines = [HEADERS_COMMENT]
+    for url in sorted(urls.values()):
+        lines.append(context.url(url))
+        lines.append(f"  {IMMUTABLE}")
+    return write_if_changed(path, ("\n".join(lines) + "\n").encode('utf-8'))
+
+
+def sync_file(src_path, dst_path, use_hash=False, link=False, manifest=None):
+    """Copy src_path to dst_path if needed; returns ADDED, CHANGED or None.
+
+    A dst_path hard-linked to src_path is the same file, so an in-place edit
+    of src_path is already published and comparing the two can't tell. With
+    a manifest, it is reported CHANGED when src_path's size or mtime moved
+    since it was linked. Without link, such a dst_path is replaced by a copy.
+    """
+    src_stat = os.stat(src_path)
+    try:
+        dst_stat = os.stat(dst_path)
+    except FileNotFoundError:
+        dst_stat = None
+
+    if dst_stat is not None and os.path.samestat(src_stat, dst_stat):
+        changed = manifest is not None and manifest.record_link(dst_path, src_stat)
+        if not link:
+            copy_file(src_path, dst_path)
+            if manifest is not None:
+                manifest.forget_link(dst_path)
+        return CHANGED if changed else None
+
+    if dst_stat is not None and not needs_copy(src_path, dst_path, src_stat, dst_stat, use_hash):
+        return None
+    change = CHANGED if dst_stat is not None else ADDED
+    method = copy_file(src_path, dst_path, link, replace=change == CHANGED)
+    if manifest is not None:
+        if method == "link":
+            manifest.record_link(dst_path, src_stat)
+        else:
+            manifest.forget_link(dst_path)
+    return change
+
+
+def sync_directory(src, dst, manifest=None, use_hash=False, log=print, changes=None, names=None, workers=COPY_WORKERS,
+                   link=False):
+    """Copy new or changed files from src into dst.
+
+    Files whose size and mtime match are skipped; when only the mtime differs
+    the contents are hashed so identical files are never rewritten. With
+    use_hash, files with matching size and mtime are hashed too. With a
+    manifest, files that were synced before but have since disappeared from
+    src are deleted; nothing else in dst is touched. Progress goes to log,
+    one line per call, and what was written or removed to changes. names
+    renames files on the way, as returned by fingerprint_assets.
+
+    The tree is walked once, then files are checked and copied on a pool of
+    workers threads (see copy_file; link hard-links instead of copying where
+    it can, and sync_file for how edits to linked files are noticed). Log
+    lines still come out in file order.
+    """
+    os.makedirs(dst, exist_ok=True)
+
+    pairs = []
+    for rel_path in list_files(src):
+        src_path = os.path.join(src, rel_path)
+        dst_path = os.path.join(dst, names.get(rel_path, rel_path) if names else rel_path)
+        pairs.append((src_path, dst_path))
+    dest_paths = [dst_path for _, dst_path in pairs]
+    for directory in sorted({os.path.dirname(dst_path) for dst_path in dest_paths}):
+        os.makedirs(directory, exist_ok=True)
+
+    def sync_batch(batch):
+        return [sync_file(src_path, dst_path, use_hash, link, manifest) for src_path, dst_path in batch]
+
+    # Handed out in batches, so thousands of small files don't each pay for a round trip to the pool
+    batches = [pairs[i:i + COPY_BATCH] for i in range(0, len(pairs), COPY_BATCH)]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = (change for batch in executor.map(sync_batch, batches) for change in batch)
+        copied = []
+        for (src_path, dst_path), change in zip(pairs, results):
+            if change is not None:
+                log(f"Copying file: {src_path} -> {dst_path}")
+                copied.append(dst_path)
+                if changes is not None:
+                    changes.record(dst_path, change)
+            if manifest is not None:
+                manifest.record_asset(src_path, dst_path)
+
+    removed = []
+    if manifest is not None:
+        removed = manifest.remove_stale_assets(dest_paths, dst)
+        for dst_path in removed:
+            log(f"Removing deleted file: {dst_path}")
+        if changes is not None:
+            changes.record_removed(removed)
+
+    log(f"{len(copied)} files copied, {len(dest_paths) - len(copied)} up to date")
+    return copied, removed
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import re
+
+TAG_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}|\{%\s*include\s+"([^"]+)"\s*%\}')
+URL_ATTR_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+
+
+class Slot:
+    __slots__ = ("name", "source")
+
+    def __init__(self, name, source):
+        self.name = name
+        self.source = source
+
+    def __repr__(self):
+        return f"Slot({self.name})"
+
+
+class Template:
+    """A template compiled into a flat list of static strings and Slots.
+
+    Slot values are either strings or callables returning an iterable of
+    chunks, so large content can be streamed without building a string.
+    Placeholders without a value are left in the output untouched.
+    """
+
+    def __init__(self, segments, dependencies, digest=None):
+        self.segments = segments
+        self.dependencies = dependencies
+        if digest is None:
+            source = "".join(segment if isinstance(segment, str) else segment.source for segment in segments)
+            digest = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        self.digest = digest
+
+    def bind(self, context):
+        """Return a copy with the href/src URLs in its static text resolved for context."""
+        def rewrite(match):
+            return f'{match.group(1)}="{context.url(match.group(2))}"'
+
+        segments = [
+            URL_ATTR_PATTERN.sub(rewrite, segment) if isinstance(segment, str) else segment
+            for segment in self.segments
+        ]
+        return Template(segments, self.dependencies, self.digest)
+
+    @property
+    def slots(self):
+        return {segment.name for segment in self.segments if isinstance(segment, Slot)}
+
+    def is_current(self):
+        for path, mtime_ns in self.dependencies.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    return False
+            except FileNotFoundError:
+                return False
+        return True
+
+    def iter_render(self, **values):
+        for segment in self.segments:
+            if isinstance(segment, str):
+                yield segment
+                continue
+            value = values.get(segment.name)
+            if value is None:
+                yield segment.source
+            elif isinstance(value, str):
+                yield value
+            else:
+                yield from value()
+
+    def render(self, **values):
+        return "".join(self.iter_render(**values))
+
+    def write(self, fp, **values):
+        for chunk in self.iter_render(**values):
+            fp.write(chunk)
+
+
+def compile_template(path):
+    segments = []
+    dependencies = {}
+    _compile_into(path, segments, dependencies, ())
+    return Template(segments, dependencies)
+
+
+def _compile_into(path, segments, dependencies, including):
+    if path in including:
+        raise Exception(f"Template include cycle: {' -> '.join(including + (path,))}")
+
+    dependencies[path] = os.stat(path).st_mtime_ns
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+
+    pos = 0
+    for match in TAG_PATTERN.finditer(source):
+        _append_text(segments, source[pos:match.start()])
+        if match.group(1):
+            segments.append(Slot(match.group(1), match.group()))
+        else:
+            include_path = os.path.join(os.path.dirname(path), match.group(2))
+            _compile_into(include_path, segments, dependencies, including + (path,))
+        pos = match.end()
+    _append_text(segments, source[pos:])
+
+
+def _append_text(segments, text):
+    if not text:
+        return
+    if segments and isinstance(segments[-1], str):
+        segments[-1] += text
+    else:
+        segments.append(text)
+
+
+_cache = {}
+
+
+def load_template(path, context=None):
+    """Return the compiled template, recompiling only when a file it reads has changed.
+
+    With a context, the template comes back bound to it (see Template.bind).
+    """
+    key = (path, context.key if context is not None else None)
+    template = _cache.get(key)
+    if template is None or not template.is_current():
+        if context is None:
+            template = compile_template(path)
+        else:
+            template = load_template(path).bind(context)
+        _cache[key] = template
+    return template
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from block_cache import BlockCache
+from markdown_to_blocks import parse_blocks
+from markdown_to_html_node import count_nodes, iter_markdown_html, markdown_to_html_node
+from metrics import PageMetrics
+from render_context import RenderContext
+from search_index import PageText
+
+MARKDOWN = "# Title\n\nSome **bold** text with a [link](/about)\n\n- one\n- two"
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = BlockCache(os.path.join(self.tmp.name, "blocks.sqlite3"))
+        self.context = RenderContext()
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_lookup_and_store(self):
+        self.assertEqual(self.cache.lookup(["a", "b"], self.context), [None, None])
+        self.cache.store({"a": ("<p>a</p>", "a")}, self.context)
+        self.assertEqual(self.cache.lookup(["a", "b"], self.context), [("<p>a</p>", "a"), None])
+
+    def test_context_is_part_of_the_key(self):
+        self.cache.store({"a": ("<p>a</p>", "a")}, self.context)
+        self.assertEqual(self.cache.lookup(["a"], RenderContext("/site/")), [None])
+
+    def test_evicts_least_recently_used(self):
+        self.cache.store({"old": ("x" * 100, "")}, self.context)
+        self.cache.store({"new": ("y" * 100, "")}, self.context)
+        self.cache.lookup(["new"], self.context)
+        self.cache.max_bytes = 150
+
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual(self.cache.lookup(["old", "new"], self.context), [None, ("y" * 100, "")])
+
+    def test_cached_render_matches_uncached(self):
+        context = RenderContext("/site/")
+        expected = markdown_to_html_node(MARKDOWN).to_html(context)
+        first = markdown_to_html_node(MARKDOWN, cache=self.cache, context=context).to_html(context)
+        second = markdown_to_html_node(MARKDOWN, cache=self.cache, context=context)
+        self.assertEqual(first, expected)
+        self.assertEqual(second.to_html(context), expected)
+        self.assertTrue(all(child.tag is None for child in second.children))
+
+    def test_cached_blocks_keep_their_text(self):
+        uncached = PageText()
+        markdown_to_html_node(MARKDOWN, text=uncached)
+        for _ in range(2):
+            cached = PageText()
+            markdown_to_html_node(MARKDOWN, cache=self.cache, context=self.context, text=cached)
+            self.assertEqual(cached.terms, uncached.terms)
+        self.assertEqual(uncached.terms["bold"], 1)
+        self.assertEqual(uncached.terms["link"], 1)
+
+    def test_node_counts_with_and_without_cache(self):
+        counts = []
+        for cache in (None, self.cache, self.cache):
+            metrics = PageMetrics("in.md", "out.html")
+            markdown_to_html_node(MARKDOWN, metrics, cache, self.context)
+            counts.append(metrics)
+        uncached, cold, warm = counts
+        expected = count_nodes(markdown_to_html_node(MARKDOWN))
+        self.assertEqual(uncached.counters["nodes"], expected)
+        # Counted before the rendered blocks are swapped for their HTML
+        self.assertEqual(cold.counters["nodes"], expected)
+        self.assertIn("render", cold.stages)
+        self.assertEqual(cold.counters["cache_misses"], 3)
+        # Only the page's div is built; the blocks come from the cache
+        self.assertEqual(warm.counters["nodes"], 1)
+        self.assertEqual(warm.counters["cache_hits"], 3)
+        self.assertNotIn("render", warm.stages)
+
+        streamed = PageMetrics("in.md", "out.html")
+        list(iter_markdown_html(parse_blocks(MARKDOWN.splitlines()), self.context, streamed))
+        self.assertEqual(streamed.counters["nodes"], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from build_changes import ADDED, CHANGED, BuildChanges, HashingWriter, replace_if_changed, write_if_changed
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "out", "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_added_unchanged_changed(self):
+        self.assertEqual(write_if_changed(self.path, b"<p>a</p>"), ADDED)
+        os.utime(self.path, (0, 0))
+        self.assertIsNone(write_if_changed(self.path, b"<p>a</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime, 0)
+        self.assertEqual(write_if_changed(self.path, b"<p>b</p>"), CHANGED)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b"<p>b</p>")
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        with self.assertRaises(TypeError):
+            write_if_changed(self.path, "not bytes")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [])
+
+    def test_replace_if_changed(self):
+        write_if_changed(self.path, "café".encode('utf-8'))
+        os.utime(self.path, (0, 0))
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            writer = HashingWriter(f)
+            writer.write("caf")
+            writer.write("é")
+        self.assertIsNone(replace_if_changed(tmp_path, self.path, writer))
+        self.assertFalse(os.path.exists(tmp_path))
+        self.assertEqual(os.stat(self.path).st_mtime, 0)
+
+        with open(tmp_path, 'wb') as f:
+            writer = HashingWriter(f)
+            writer.write("cafe")
+        self.assertEqual(replace_if_changed(tmp_path, self.path, writer), CHANGED)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b"cafe")
+
+
+class TestBuildChanges(unittest.TestCase):
+    def test_to_dict_is_relative_and_sorted(self):
+        changes = BuildChanges()
+        changes.record(os.path.join("docs", "b.html"), ADDED)
+        changes.record(os.path.join("docs", "a.html"), ADDED)
+        changes.record(os.path.join("docs", "c.css"), None)
+        changes.record_removed([os.path.join("docs", "old", "index.html")])
+        self.assertEqual(changes.to_dict("docs"), {
+            "added": ["a.html", "b.html"],
+            "changed": [],
+            "removed": [os.path.join("old", "index.html")],
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
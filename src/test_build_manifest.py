@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import build_manifest
+from build_manifest import BuildManifest
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.source = os.path.join(self.root, "index.md")
+        self.dest_root = os.path.join(self.root, "docs")
+        self.dest = os.path.join(self.dest_root, "index.html")
+        self.write(self.source, "# Hello")
+        self.write(self.dest, "<h1>Hello</h1>")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_unknown_page_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/"))
+
+    def test_recorded_page_is_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.dest, "t", "/")
+        self.assertTrue(manifest.is_fresh(self.source, self.dest, "t", "/"))
+
+    def test_round_trip(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.dest, "t", "/")
+        manifest.save()
+        loaded = BuildManifest.load(self.manifest_path)
+        self.assertTrue(loaded.is_fresh(self.source, self.dest, "t", "/"))
+
+    def test_changed_inputs_are_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.dest, "t", "/")
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "other", "/"))
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/blog/"))
+
+        self.write(self.source, "# Hello, world")
+        manifest = BuildManifest(self.manifest_path, manifest.pages)
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/"))
+
+    def test_touched_source_with_same_content_is_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.dest, "t", "/")
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(manifest.is_fresh(self.source, self.dest, "t", "/"))
+
+    def test_new_generator_version_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.dest, "t", "/")
+        with mock.patch.object(build_manifest, "GENERATOR_VERSION", build_manifest.GENERATOR_VERSION + 1):
+            self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/"))
+        with mock.patch.object(build_manifest, "RENDERER_VERSION", build_manifest.RENDERER_VERSION + 1):
+            self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/"))
+
+        # Entries written before pages were versioned
+        del manifest.pages[self.dest]["generator"]
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/"))
+
+    def test_missing_output_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.dest, "t", "/")
+        os.remove(self.dest)
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/"))
+
+    def test_remove_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.dest, "t", "/")
+        other_dest = os.path.join(self.root, "elsewhere", "index.html")
+        manifest.record(self.source, other_dest, "t", "/")
+
+        removed = manifest.remove_stale([], self.dest_root)
+
+        self.assertEqual(removed, [self.dest])
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertIn(other_dest, manifest.pages)
+
+    def test_asset_map_change_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.dest, "t", "/", "assets-1")
+        self.assertTrue(manifest.is_fresh(self.source, self.dest, "t", "/", "assets-1"))
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/", "assets-2"))
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/"))
+
+    def test_minify_change_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.source, self.dest, "t", "/", minify=True)
+        self.assertTrue(manifest.is_fresh(self.source, self.dest, "t", "/", minify=True))
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "t", "/"))
+
+    def test_file_hash_is_cached_by_stat(self):
+        manifest = BuildManifest(self.manifest_path)
+        digest = manifest.file_hash(self.source)
+        manifest.save()
+        loaded = BuildManifest.load(self.manifest_path)
+        self.assertEqual(loaded.file_hash(self.source), digest)
+        self.assertFalse(loaded.dirty)
+
+        self.write(self.source, "# Changed")
+        self.assertNotEqual(loaded.file_hash(self.source), digest)
+
+        loaded.retain_hashes([], self.root)
+        self.assertEqual(loaded.hashes, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
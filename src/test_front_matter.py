@@ -0,0 +1,33 @@
+import unittest
+from front_matter import split_front_matter, split_front_matter_lines
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_fields(self):
+        markdown = "---\nTitle: \"Tom, again\"\ndate: 2024-05-01\ntags: [lore, tolkien]\ncategories:\n  - essays\n  - opinion\n---\n# Tom\n\nText"
+        fields, body = split_front_matter(markdown)
+        self.assertEqual(fields, {
+            "title": "Tom, again",
+            "date": "2024-05-01",
+            "tags": ["lore", "tolkien"],
+            "categories": ["essays", "opinion"],
+        })
+        self.assertEqual(body, "# Tom\n\nText")
+
+    def test_no_front_matter(self):
+        markdown = "# Tom\n\n---\n\ntitle: not a field"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_unclosed_block_is_content(self):
+        markdown = "---\ntitle: Tom\n# Tom"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_lines(self):
+        fields, rest = split_front_matter_lines(["---", "title: Tom", "---", "# Tom", "Text"])
+        self.assertEqual(fields, {"title": "Tom"})
+        self.assertEqual(list(rest), ["# Tom", "Text"])
+        self.assertEqual(list(split_front_matter_lines([])[1]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import page_index
+from build_changes import BuildChanges
+from build_manifest import BuildManifest
+from generate_pages_recursive import collect_pages, generate_pages_recursive
+from page_index import PageIndex
+from page_options import PageOptions
+from search_index import SearchIndex
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestGeneratePagesRecursive(unittest.TestCase):
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome **home**")
+        for name in ["a", "b", "c"]:
+            self.write(os.path.join(self.content, "blog", name, "index.md"), f"# Post {name}\n\n" + "text " * 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'r', encoding='utf-8') as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_collect_pages_is_sorted(self):
+        dest = os.path.join(self.root, "out")
+        pages = collect_pages(self.content, dest)
+        self.assertEqual(
+            [os.path.relpath(dest_path, dest) for _, dest_path in pages],
+            [
+                os.path.join("blog", "a", "index.html"),
+                os.path.join("blog", "b", "index.html"),
+                os.path.join("blog", "c", "index.html"),
+                "index.html",
+            ],
+        )
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        generate_pages_recursive(self.content, self.template, serial)
+        generate_pages_recursive(self.content, self.template, parallel, jobs=2)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_parallel_error_names_page(self):
+        broken = os.path.join(self.content, "broken.md")
+        self.write(broken, "no heading here")
+        with self.assertRaises(Exception) as context:
+            generate_pages_recursive(self.content, self.template, os.path.join(self.root, "out"), jobs=2)
+        self.assertIn(broken, str(context.exception))
+
+    def test_regenerating_leaves_identical_pages_alone(self):
+        dest = os.path.join(self.root, "out")
+        generate_pages_recursive(self.content, self.template, dest)
+        page = os.path.join(dest, "index.html")
+        os.utime(page, (0, 0))
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# Post a\n\nEdited")
+
+        changes = BuildChanges()
+        generate_pages_recursive(self.content, self.template, dest, changes=changes)
+
+        self.assertEqual(os.stat(page).st_mtime, 0)
+        self.assertEqual(changes.to_dict(dest), {
+            "added": [],
+            "changed": [os.path.join("blog", "a", "index.html")],
+            "removed": [],
+        })
+
+
+    def test_assets_are_rewritten_and_tracked(self):
+        self.write(self.template, '<link href="/index.css" />{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![me](/images/me.png)")
+        dest = os.path.join(self.root, "out")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        assets = {"/index.css": "/index.11111111.css", "/images/me.png": "/images/me.22222222.png"}
+
+        generate_pages_recursive(self.content, self.template, dest, PageOptions("/site/", assets), manifest)
+        with open(os.path.join(dest, "index.html"), 'r', encoding='utf-8') as f:
+            html = f.read()
+        self.assertIn('href="/site/index.11111111.css"', html)
+        self.assertIn('src="/site/images/me.22222222.png"', html)
+
+        # A new asset map makes every page stale
+        assets["/index.css"] = "/index.33333333.css"
+        generated = generate_pages_recursive(self.content, self.template, dest, PageOptions("/site/", assets), manifest)
+        self.assertEqual(len(generated), 4)
+
+    def test_search_index_follows_the_pages(self):
+        dest = os.path.join(self.root, "out")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        generate_pages_recursive(self.content, self.template, dest, PageOptions("/site/"), manifest)
+
+        # Pages built before there was a search index are read again for it
+        search = SearchIndex(os.path.join(self.root, "search.json"))
+        generated = generate_pages_recursive(self.content, self.template, dest, PageOptions("/site/"), manifest, search=search, jobs=2)
+        self.assertEqual(len(generated), 4)
+        home = search.pages[os.path.join(dest, "index.html")]
+        self.assertEqual((home["url"], home["title"]), ("/site/", "Home"))
+        self.assertEqual(home["terms"], {"home": 2, "welcome": 1})
+
+        os.remove(os.path.join(self.content, "blog", "c", "index.md"))
+        generated = generate_pages_recursive(self.content, self.template, dest, PageOptions("/site/"), manifest, search=search)
+        self.assertEqual(generated, [])
+        self.assertEqual(len(search.pages), 3)
+
+    def test_parallel_search_index_matches_serial(self):
+        # The biggest page finishes last in parallel, but ids follow the output paths
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# Post a\n\n" + "text " * 50000)
+        trees = []
+        for jobs in (1, 2):
+            dest = os.path.join(self.root, f"out{jobs}")
+            search = SearchIndex(os.path.join(self.root, f"search{jobs}.json"))
+            generate_pages_recursive(self.content, self.template, dest, search=search, jobs=jobs)
+            search.write(dest)
+            trees.append(self.read_tree(os.path.join(dest, "search")))
+        self.assertEqual(trees[0], trees[1])
+
+    def test_page_index_follows_the_pages(self):
+        dest = os.path.join(self.root, "out")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        index = PageIndex(os.path.join(self.root, "page-index.json"))
+        generate_pages_recursive(self.content, self.template, dest, manifest=manifest, page_index=index)
+        self.assertEqual(sorted(entry["url"] for entry in index.list("/blog/")), ["/blog/a/", "/blog/b/", "/blog/c/"])
+
+        # Only pages that are regenerated are read again
+        post = os.path.join(self.content, "blog", "a", "index.md")
+        self.write(post, "---\ntitle: First post\ndate: 2024-01-01\n---\n# Post a\n")
+        os.remove(os.path.join(self.content, "blog", "c", "index.md"))
+        manifest = BuildManifest(manifest.path, manifest.pages)
+        index = PageIndex.load(index.path)
+        with mock.patch.object(page_index, "read_page_metadata", wraps=page_index.read_page_metadata) as read:
+            generated = generate_pages_recursive(self.content, self.template, dest, manifest=manifest, page_index=index)
+        self.assertEqual(generated, [os.path.join(dest, "blog", "a", "index.html")])
+        self.assertEqual([call.args[0] for call in read.call_args_list], [post])
+        self.assertEqual([entry["title"] for entry in index.list("/blog/")], ["First post", "Post b"])
+        with open(generated[0], 'r', encoding='utf-8') as f:
+            self.assertIn("<title>First post</title>", f.read())
+
+        # With nothing regenerated the saved index isn't even read, unless it was changed since
+        index = PageIndex.load(index.path)
+        with mock.patch.object(PageIndex, "_read", wraps=index._read) as read:
+            generate_pages_recursive(self.content, self.template, dest, manifest=manifest, page_index=index)
+        read.assert_not_called()
+        os.remove(index.path)
+        index = PageIndex.load(index.path)
+        generate_pages_recursive(self.content, self.template, dest, manifest=manifest, page_index=index)
+        self.assertEqual(len(PageIndex.load(index.path).pages), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
+from render_context import RenderContext
 
 class TestHTMLNode(unittest.TestCase):
     def test_repr(self):
@@ -30,6 +32,66 @@ class TestHTMLNode(unittest.TestCase):
             parent_node.to_html(),
             "<div><span><b>grandchild</b></span></div>",
         )
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "Hello "), LeafNode("b", "world")]),
+            LeafNode("img", "", {"src": "/a.png", "alt": "a"}),
+        ])
+        self.assertEqual("".join(node.iter_html()), '<div><p>Hello <b>world</b></p><img src="/a.png" alt="a" /></div>')
+
+    def test_write_html(self):
+        node = ParentNode("p", [LeafNode("i", "streamed")])
+        fp = io.StringIO()
+        node.write_html(fp)
+        self.assertEqual(fp.getvalue(), "<p><i>streamed</i></p>")
+        LeafNode("b", "leaf").write_html(fp)
+        self.assertEqual(fp.getvalue(), "<p><i>streamed</i></p><b>leaf</b>")
+
+    def test_deep_tree_does_not_recurse(self):
+        node = LeafNode("b", "deep")
+        for _ in range(10000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 10000 + "<b>deep</b>"))
+
+    def test_parent_without_children_raises(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [ParentNode("p", [])]).to_html()
+    def test_nodes_are_slotted(self):
+        node = LeafNode("b", "bold")
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertFalse(hasattr(ParentNode("p", [node]), "__dict__"))
+
+    def test_tags_are_interned(self):
+        level = 2
+        first = ParentNode(f"h{level}", [LeafNode(None, "a")])
+        second = ParentNode(f"h{level}", [LeafNode(None, "b")])
+        self.assertIs(first.tag, second.tag)
+
+    def test_empty_props_are_not_stored(self):
+        self.assertIsNone(LeafNode("p", "text", {}).props)
+        self.assertEqual(LeafNode("p", "text", {}).to_html(), "<p>text</p>")
+    def test_basepath_applies_to_link_and_image_urls(self):
+        node = ParentNode("p", [
+            LeafNode("a", "home", {"href": "/"}),
+            LeafNode("img", "", {"src": "/images/a.png", "alt": "a"}),
+            LeafNode("code", 'href="/not-a-link'),
+        ])
+        self.assertEqual(
+            node.to_html(RenderContext("/site/")),
+            '<p><a href="/site/">home</a><img src="/site/images/a.png" alt="a" /><code>href="/not-a-link</code></p>',
+        )
+
+    def test_image_sizes_and_lazy_loading(self):
+        context = RenderContext("/site/", images={"/images/a.png": (640, 480)})
+        self.assertEqual(
+            LeafNode("img", "", {"src": "/images/a.png", "alt": "a"}).to_html(context),
+            '<img src="/site/images/a.png" alt="a" width="640" height="480" loading="lazy" decoding="async" />',
+        )
+        self.assertEqual(
+            LeafNode("img", "", {"src": "https://example.com/b.png", "alt": "b"}).to_html(context),
+            '<img src="https://example.com/b.png" alt="b" loading="lazy" decoding="async" />',
+        )
 
 if __name__ == "__main__":
     unittest.main()
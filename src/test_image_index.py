@@ -0,0 +1,96 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+import image_index
+from build_manifest import BuildManifest
+from image_index import image_sizes, read_image_size
+
+
+def png(width, height):
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    chunk = struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+    return b"\x89PNG\r\n\x1a\n" + chunk
+
+
+def gif(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00\x00\x00;"
+
+
+def jpeg(width, height, marker=0xC0):
+    app0 = b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    frame = struct.pack(">BHHB", 8, height, width, 3) + b"\x00" * 9
+    return (
+        b"\xff\xd8"
+        + b"\xff\xe0" + struct.pack(">H", len(app0) + 2) + app0
+        # A DHT segment, whose marker sits in the SOF range but isn't one
+        + b"\xff\xc4" + struct.pack(">H", 5) + b"\x00\x00\x00"
+        + b"\xff\xff" + bytes([marker]) + struct.pack(">H", len(frame) + 2) + frame
+        + b"\xff\xd9"
+    )
+
+
+class TestImageIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.static = os.path.join(self.root, "static")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, data):
+        path = os.path.join(self.static, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_reads_sizes(self):
+        self.assertEqual(read_image_size(self.write("a.png", png(640, 480))), (640, 480))
+        self.assertEqual(read_image_size(self.write("b.gif", gif(16, 9))), (16, 9))
+        self.assertEqual(read_image_size(self.write("c.jpg", jpeg(1024, 768))), (1024, 768))
+        self.assertEqual(read_image_size(self.write("d.jpg", jpeg(300, 200, marker=0xC2))), (300, 200))
+
+    def test_unknown_or_truncated_files(self):
+        self.assertIsNone(read_image_size(self.write("a.png", b"not an image")))
+        self.assertIsNone(read_image_size(self.write("b.jpg", jpeg(10, 10)[:30])))
+
+    def test_sizes_are_cached_until_the_image_changes(self):
+        self.write("images/a.png", png(1, 2))
+        self.write("images/b.gif", gif(3, 4))
+        self.write("images/broken.jpg", b"\xff\xd8")
+        self.write("index.css", b"body{}")
+        manifest_path = os.path.join(self.root, "manifest.json")
+        manifest = BuildManifest(manifest_path)
+        expected = {"/images/a.png": (1, 2), "/images/b.gif": (3, 4)}
+        self.assertEqual(image_sizes(self.static, manifest), expected)
+        manifest.save()
+
+        reads = []
+        read = image_index.read_image_size
+        image_index.read_image_size = lambda path: reads.append(path) or read(path)
+        try:
+            loaded = BuildManifest.load(manifest_path)
+            self.assertEqual(image_sizes(self.static, loaded), expected)
+            self.assertEqual(reads, [])
+
+            path = self.write("images/a.png", png(10, 20))
+            os.utime(path, ns=(1, 1))
+            self.assertEqual(image_sizes(self.static, loaded)["/images/a.png"], (10, 20))
+            self.assertEqual(reads, [path])
+        finally:
+            image_index.read_image_size = read
+
+    def test_removed_images_are_forgotten(self):
+        path = self.write("a.png", png(1, 1))
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        image_sizes(self.static, manifest)
+        os.remove(path)
+        self.assertEqual(image_sizes(self.static, manifest), {})
+        self.assertEqual(manifest.images, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
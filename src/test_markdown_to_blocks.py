@@ -1,5 +1,8 @@
+import os
+import tempfile
 import unittest
-from markdown_to_blocks import markdown_to_blocks, block_to_block_type, BlockType
+import markdown_to_blocks as markdown_to_blocks_module
+from markdown_to_blocks import markdown_to_blocks, block_to_block_type, BlockType, iter_lines_mmap, parse_blocks
 
 
 class TestMarkdownToBlocks(unittest.TestCase):
@@ -294,5 +297,64 @@ class TestBlockToBlockType(unittest.TestCase):
         self.assertEqual(block_to_block_type("1. item\n- item"), BlockType.PARAGRAPH)
 
 
+class TestIterLinesMmap(unittest.TestCase):
+    def lines_from_file(self, data):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'wb') as f:
+                f.write(data)
+            return list(iter_lines_mmap(path))
+
+    def test_matches_splitlines(self):
+        cases = [
+            "# Heading\n\nParagraph\nmore\n\n- a\n- b\n",
+            "\n\n  leading blank lines\n   \n\t\ntrailing   \n\n\n",
+            "windows\r\nline\r\n\r\nendings",
+            "unicode \u2028\u2028separator and caf\u00e9\n\n> quote",
+            "```\ncode\n\nstill code\n```",
+            "no newline at end",
+        ]
+        for markdown in cases:
+            with self.subTest(markdown=markdown):
+                self.assertEqual(self.lines_from_file(markdown.encode('utf-8')), markdown.splitlines())
+
+    def test_empty_file(self):
+        self.assertEqual(self.lines_from_file(b""), [])
+
+    def test_small_window(self):
+        markdown = "caf\u00e9 line\n" * 50 + "\n" + "x" * 300 + "\n\n- a\r\n- b"
+        window = markdown_to_blocks_module.MMAP_WINDOW
+        markdown_to_blocks_module.MMAP_WINDOW = 64
+        try:
+            self.assertEqual(self.lines_from_file(markdown.encode('utf-8')), markdown.splitlines())
+        finally:
+            markdown_to_blocks_module.MMAP_WINDOW = window
+
+
+class TestParseBlocks(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        cases = [
+            "# Heading\n\nParagraph\nmore\n\n- a\n- b\n",
+            "  ## indented heading  \n\n####### too deep\n\n#\nnot heading",
+            "# \nheading on the next line",
+            "```\ncode\n```\n\n```\nunclosed",
+            "> a\n> b\n\n> a\nb",
+            "1. a\n2. b\n3. c\n\n1. a\n3. b",
+            "\n".join(f"{i}. item" for i in range(1, 11)),
+            "- a\n-b\n\n- a  \n- b  ",
+        ]
+        for markdown in cases:
+            with self.subTest(markdown=markdown):
+                expected = [(block_to_block_type(block), block) for block in markdown_to_blocks(markdown)]
+                parsed = [(block_type, "\n".join(lines)) for block_type, lines in parse_blocks(markdown.splitlines())]
+                self.assertEqual(parsed, expected)
+
+    def test_lazy(self):
+        lines = iter(["- a", "- b", "", "para"])
+        blocks = parse_blocks(lines)
+        self.assertEqual(next(blocks), (BlockType.UNORDERED_LIST, ["- a", "- b"]))
+        self.assertEqual(next(lines), "para")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-from markdown_to_html_node import markdown_to_html_node
+from markdown_to_blocks import parse_blocks
+from markdown_to_html_node import iter_markdown_html, markdown_to_html_node
 
 
 class TestMarkdownToHTML(unittest.TestCase):
@@ -55,5 +56,10 @@ This is another paragraph with _italic_ text and `code` here
             "<div><ul><li>Item 1</li><li>Item 2 with <i>italic</i></li><li><b>Bold</b> item 3</li></ul></div>",
         )
 
+    def test_iter_markdown_html_matches(self):
+        md = "# Heading\n\nSome **bold** text\n\n```\ncode\n```\n\n1. one\n2. two"
+        streamed = "".join(iter_markdown_html(parse_blocks(md.splitlines())))
+        self.assertEqual(streamed, markdown_to_html_node(md).to_html())
+
 if __name__ == "__main__":
     unittest.main()
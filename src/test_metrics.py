@@ -0,0 +1,63 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from metrics import NO_METRICS, BuildMetrics, PageMetrics
+
+
+class TestPageMetrics(unittest.TestCase):
+    def test_stages_and_counters(self):
+        metrics = PageMetrics("a.md", "a.html")
+        with metrics.stage("read"):
+            pass
+        metrics.count("blocks", 3)
+        metrics.count("blocks")
+        page = metrics.to_dict()
+        self.assertIn("read", page["stages"])
+        self.assertEqual(page["counters"], {"blocks": 4})
+
+    def test_output_splits_render_write_and_template(self):
+        metrics = PageMetrics("a.md", "a.html")
+        fp = io.StringIO()
+        with metrics.output():
+            writer = metrics.writer(fp)
+            for chunk in metrics.timed(iter(["<p>", "hi", "</p>"]), "render"):
+                writer.write(chunk)
+        self.assertEqual(fp.getvalue(), "<p>hi</p>")
+        self.assertEqual(set(metrics.stages), {"render", "write", "template"})
+
+    def test_null_metrics_pass_through(self):
+        chunks = ["a"]
+        fp = io.StringIO()
+        self.assertIs(NO_METRICS.timed(chunks, "render"), chunks)
+        self.assertIs(NO_METRICS.writer(fp), fp)
+
+
+class TestBuildMetrics(unittest.TestCase):
+    def page(self, name, seconds):
+        return {"source": name, "dest": name, "seconds": seconds, "stages": {"read": seconds}, "counters": {"blocks": 2}}
+
+    def test_summary_lists_slowest_pages(self):
+        metrics = BuildMetrics()
+        for name, seconds in [("a", 0.1), ("b", 0.3), ("c", 0.2)]:
+            metrics.add_page(self.page(name, seconds))
+        summary = metrics.summary(top=2)
+        self.assertEqual(summary["pages"], 3)
+        self.assertEqual(summary["counters"], {"blocks": 6})
+        self.assertAlmostEqual(summary["page_stages"]["read"], 0.6)
+        self.assertEqual([page["source"] for page in summary["slowest_pages"]], ["b", "c"])
+
+    def test_write(self):
+        metrics = BuildMetrics()
+        with metrics.stage("static"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.json")
+            metrics.write(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                self.assertIn("static", json.load(f)["build_stages"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from minify import HTMLMinifier, minify, minify_chunks
+
+
+class TestMinify(unittest.TestCase):
+    def test_collapses_whitespace(self):
+        html = "<html>\n  <body>\n    <p>Some   text\n\tand more</p>\n  </body>\n</html>\n"
+        self.assertEqual(minify(html), "<html> <body> <p>Some text and more</p> </body> </html>")
+
+    def test_strips_comments(self):
+        self.assertEqual(minify("<p>a <!-- note --> b</p><!--\n-->"), "<p>a b</p>")
+
+    def test_keeps_pre_and_code(self):
+        html = "<div>\n<pre><code>def f():\n    return  1\n</code></pre>\n<p><code>a   b</code>  c</p></div>"
+        self.assertEqual(minify(html), "<div> <pre><code>def f():\n    return  1\n</code></pre> <p><code>a   b</code> c</p></div>")
+
+    def test_comment_inside_code_is_kept(self):
+        self.assertEqual(minify("<code><!-- x --></code>"), "<code><!-- x --></code>")
+
+    def test_tags_kept_as_written(self):
+        html = '<a  href="/x?a=1>2"   title=\'q\'>link</a>'
+        self.assertEqual(minify(html), html)
+
+    def test_stray_angle_bracket_is_text(self):
+        self.assertEqual(minify("<p>1 < 2  and 3 <b</p>"), "<p>1 < 2 and 3 <b</p>")
+
+    def test_chunk_boundaries_do_not_matter(self):
+        html = (
+            "<!doctype html>\n<html>  <!-- c -->\n<body><h1>Title</h1>\n"
+            '<p><a href="/a b">x</a>   y</p><pre>  keep\n  this </PRE>\n<p>1 < 2</p>\n</body></html>\n'
+        )
+        expected = minify(html)
+        self.assertEqual("".join(minify_chunks(html)), expected)
+        for size in (2, 3, 5, 7):
+            chunks = [html[i:i + size] for i in range(0, len(html), size)]
+            self.assertEqual("".join(minify_chunks(chunks)), expected)
+
+    def test_output_is_incremental(self):
+        minifier = HTMLMinifier()
+        self.assertEqual(minifier.feed("<p>one  two"), "<p>one two")
+        self.assertEqual(minifier.feed(" </p><pre> a"), " </p><pre>")
+        self.assertEqual(minifier.feed(" b</pre>"), " a b</pre>")
+        self.assertEqual(minifier.close(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import page_index
+from page_index import PageIndex, read_page_metadata
+
+
+class TestPageIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.state = os.path.join(self.tmp.name, "page-index.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text, mtime=None):
+        path = os.path.join(self.content, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def test_read_page_metadata(self):
+        path = self.write("post.md", "---\ndate: 2024-05-01\ntags: lore, tolkien\n---\n# Old Tom\n\nSee [the wiki](https://example.com/tom) now.\n\n```\ncode is not counted\n```\n")
+        metadata = read_page_metadata(path)
+        self.assertEqual(metadata["title"], "Old Tom")
+        self.assertEqual(metadata["date"], "2024-05-01")
+        self.assertEqual(metadata["tags"], ["lore", "tolkien"])
+        self.assertEqual(metadata["words"], 6)
+        self.assertEqual(len(metadata["source_hash"]), 64)
+
+    def test_front_matter_title_wins(self):
+        path = self.write("post.md", "---\ntitle: Bombadil\n---\n# Old Tom\n")
+        self.assertEqual(read_page_metadata(path)["title"], "Bombadil")
+
+    def test_list_by_prefix_newest_first(self):
+        self.write("index.md", "# Home\n")
+        self.write("about.md", "# About\n")
+        self.write("blog/tom/index.md", "---\ndate: 2024-01-01\n---\n# Tom\n")
+        self.write("blog/ring/index.md", "---\ndate: 2024-03-01\n---\n# Ring\n")
+        self.write("blog/draft/index.md", "# Draft\n")
+        index = PageIndex(self.state)
+        index.scan(self.content)
+        self.assertEqual([entry["url"] for entry in index.list("/blog/")], ["/blog/ring/", "/blog/tom/", "/blog/draft/"])
+        self.assertEqual(sorted(entry["url"] for entry in index.list()), ["/", "/about.html", "/blog/draft/", "/blog/ring/", "/blog/tom/"])
+
+    def test_unchanged_pages_are_not_read(self):
+        tom = self.write("tom.md", "# Tom\n", mtime=1000)
+        ring = self.write("ring.md", "# Ring\n", mtime=1000)
+        index = PageIndex(self.state)
+        self.assertEqual(sorted(index.scan(self.content)), sorted([tom, ring]))
+        index.save()
+
+        self.write("ring.md", "# The Ring\n", mtime=2000)
+        os.remove(tom)
+        index = PageIndex.load(self.state)
+        with mock.patch.object(page_index, "read_page_metadata", wraps=read_page_metadata) as read:
+            self.assertEqual(index.scan(self.content), [ring])
+        self.assertEqual([call.args[0] for call in read.call_args_list], [ring])
+        self.assertEqual(list(index.pages), [ring])
+        self.assertEqual(index.pages[ring]["title"], "The Ring")
+
+    def test_touched_page_is_read_once(self):
+        path = self.write("tom.md", "# Tom\n", mtime=1000)
+        index = PageIndex(self.state)
+        index.scan(self.content)
+        os.utime(path, (2000, 2000))
+        self.assertEqual(index.scan(self.content), [path])
+        self.assertEqual(index.pages[path]["mtime_ns"], 2000 * 10**9)
+        self.assertEqual(index.scan(self.content), [])
+
+    def test_title_matches_rendering(self):
+        # A "# " line inside a paragraph or a code block is not a heading
+        path = self.write("post.md", "Intro\n# not a title\n\n```\n# comment\n```\n\n# Real title\n")
+        self.assertEqual(read_page_metadata(path)["title"], "Real title")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import generate_page as generate_page_module
+from generate_page import generate_page
+from minify import minify
+from page_options import PageOptions
+from page_pipeline import generate_pages_pipelined, run_pipeline
+
+TEMPLATE = '<title>{{ Title }}</title><a href="/x">x</a><body>{{ Content }}</body>'
+
+
+class TestPagePipeline(unittest.TestCase):
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.pages = []
+        for i in range(20):
+            source = os.path.join(self.root, "content", f"page{i}.md")
+            self.write(source, f"# Page {i}\n\nSome **text** and a [link](/page{i})")
+            self.pages.append((source, os.path.join(self.root, "out", f"p{i}", "index.html")))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_matches_generate_page(self):
+        generate_pages_pipelined(self.pages, self.template, PageOptions("/base/"))
+        for source, dest in self.pages:
+            expected = os.path.join(self.root, "expected.html")
+            generate_page(source, self.template, expected, PageOptions("/base/"))
+            self.assertEqual(self.read(dest), self.read(expected))
+
+    def test_minify_matches_streamed_minify(self):
+        self.write(self.template, "<html>\n  <title>{{ Title }}</title>  <!-- x -->\n<body>{{ Content }}</body>\n</html>\n")
+        self.write(self.pages[0][0], "# Page\n\n```\nkeep   this\n  indented\n```\n\nsome   text")
+        generate_pages_pipelined(self.pages[:1], self.template, PageOptions(minify=True))
+        expected = os.path.join(self.root, "expected.html")
+        generate_page(self.pages[0][0], self.template, expected)
+        self.assertEqual(self.read(self.pages[0][1]), minify(self.read(expected)))
+        self.assertIn("keep   this\n  indented", self.read(self.pages[0][1]))
+
+        streamed = os.path.join(self.root, "streamed.html")
+        generate_page(self.pages[0][0], self.template, streamed, PageOptions(minify=True))
+        self.assertEqual(self.read(streamed), self.read(self.pages[0][1]))
+
+    def test_done_in_page_order_with_small_queues(self):
+        done = []
+        on_done = lambda source, dest, metrics, change, text: done.append((source, dest))
+        asyncio.run(run_pipeline(self.pages, self.template, on_done=on_done, io_workers=3, queue_size=1))
+        self.assertEqual(done, self.pages)
+
+    def test_unchanged_pages_are_left_alone(self):
+        generate_pages_pipelined(self.pages[:1], self.template)
+        os.utime(self.pages[0][1], (0, 0))
+        done = []
+        on_done = lambda source, dest, metrics, change, text: done.append(change)
+        generate_pages_pipelined(self.pages[:1], self.template, on_done=on_done)
+        self.assertEqual(done, [None])
+        self.assertEqual(os.stat(self.pages[0][1]).st_mtime, 0)
+
+    def test_metrics(self):
+        done = []
+        on_done = lambda source, dest, metrics, change, text: done.append(metrics)
+        generate_pages_pipelined(self.pages[:1], self.template, PageOptions(collect_metrics=True), on_done)
+        self.assertIn("read", done[0]["stages"])
+        self.assertIn("write", done[0]["stages"])
+        self.assertEqual(done[0]["counters"]["bytes_written"], os.path.getsize(self.pages[0][1]))
+
+    def test_error_names_page(self):
+        broken = self.pages[5][0]
+        self.write(broken, "no heading here")
+        with self.assertRaises(Exception) as context:
+            generate_pages_pipelined(self.pages, self.template)
+        self.assertIn(broken, str(context.exception))
+
+    def test_failed_page_leaves_no_temporary_file(self):
+        source, dest = self.pages[0]
+        self.write(source, "# Bad\n\n```\n```\n")
+        threshold = generate_page_module.STREAMING_THRESHOLD
+        for streaming_threshold in (threshold, 0):
+            generate_page_module.STREAMING_THRESHOLD = streaming_threshold
+            try:
+                with self.assertRaises(Exception):
+                    generate_pages_pipelined(self.pages[:1], self.template)
+            finally:
+                generate_page_module.STREAMING_THRESHOLD = threshold
+            self.assertEqual(os.listdir(os.path.dirname(dest)), [])
+
+    def test_large_pages_are_streamed(self):
+        generate_pages_pipelined(self.pages[:2], self.template)
+        expected = [self.read(dest) for _, dest in self.pages[:2]]
+        for _, dest in self.pages[:2]:
+            os.remove(dest)
+
+        threshold = generate_page_module.STREAMING_THRESHOLD
+        generate_page_module.STREAMING_THRESHOLD = 0
+        try:
+            generate_pages_pipelined(self.pages[:2], self.template)
+        finally:
+            generate_page_module.STREAMING_THRESHOLD = threshold
+        self.assertEqual([self.read(dest) for _, dest in self.pages[:2]], expected)
+
+    def test_front_matter_is_stripped(self):
+        self.write(self.pages[0][0], "---\ntitle: Old Tom\ntags: [lore]\n---\n# Page\n\ntext")
+        generate_pages_pipelined(self.pages[:1], self.template)
+        expected = "<title>Old Tom</title><a href=\"/x\">x</a><body><div><h1>Page</h1><p>text</p></div></body>"
+        self.assertEqual(self.read(self.pages[0][1]), expected)
+
+        streamed = os.path.join(self.root, "streamed.html")
+        threshold = generate_page_module.STREAMING_THRESHOLD
+        generate_page_module.STREAMING_THRESHOLD = 0
+        try:
+            generate_page(self.pages[0][0], self.template, streamed)
+        finally:
+            generate_page_module.STREAMING_THRESHOLD = threshold
+        self.assertEqual(self.read(streamed), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
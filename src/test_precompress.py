@@ -0,0 +1,82 @@
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from build_changes import BuildChanges
+from precompress import COMPRESSORS, GZIP, ZSTD, precompress_directory, remove_precompressed
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.page = os.path.join(self.root, "blog", "index.html")
+        self.css = os.path.join(self.root, "index.css")
+        self.write(self.page, "<p>hello</p>\n" * 200)
+        self.write(self.css, "body {}")
+        self.write(os.path.join(self.root, "image.png"), "png" * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_writes_siblings_above_threshold(self):
+        changes = BuildChanges()
+        precompress_directory(self.root, changes=changes)
+        with gzip.open(self.page + ".gz", 'rt', encoding='utf-8') as f:
+            self.assertEqual(f.read(), "<p>hello</p>\n" * 200)
+        self.assertFalse(os.path.exists(self.css + ".gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "image.png.gz")))
+        self.assertEqual(changes.to_dict(self.root)["added"], [os.path.join("blog", "index.html.gz")])
+
+    def test_up_to_date_siblings_are_skipped(self):
+        precompress_directory(self.root, workers=2)
+        self.assertEqual(precompress_directory(self.root, workers=2), [])
+
+        self.write(self.page, "<p>changed</p>\n" * 200)
+        self.assertEqual(precompress_directory(self.root), [(self.page + ".gz", "changed")])
+
+    def test_stale_siblings_are_removed(self):
+        precompress_directory(self.root)
+        # Shrunk below the threshold
+        self.write(self.page, "<p>tiny</p>")
+        self.assertEqual(precompress_directory(self.root), [(self.page + ".gz", "removed")])
+
+        # Source removed, except for files the build copied on purpose
+        kept = os.path.join(self.root, "data.json.gz")
+        self.write(kept, "x")
+        self.write(self.page, "<p>hello</p>\n" * 200)
+        precompress_directory(self.root, keep={kept})
+        os.remove(self.page)
+        self.assertEqual(precompress_directory(self.root, keep={kept}), [(self.page + ".gz", "removed")])
+        self.assertTrue(os.path.exists(kept))
+
+    def test_remove_precompressed(self):
+        precompress_directory(self.root)
+        orphan = os.path.join(self.root, "index.1a2b3c4d.css.gz")
+        kept = os.path.join(self.root, "data.json.gz")
+        self.write(orphan, "x")
+        self.write(kept, "x")
+
+        changes = BuildChanges()
+        removed = remove_precompressed(self.root, (GZIP, ZSTD), changes, keep={kept})
+        self.assertEqual(sorted(removed), sorted([self.page + ".gz", orphan]))
+        self.assertEqual(changes.to_dict(self.root)["removed"], sorted([os.path.join("blog", "index.html.gz"), "index.1a2b3c4d.css.gz"]))
+        self.assertTrue(os.path.exists(kept))
+        self.assertTrue(os.path.exists(self.page))
+
+    @unittest.skipUnless(ZSTD in COMPRESSORS, "zstd is not available")
+    def test_zstd(self):
+        precompress_directory(self.root, (GZIP, ZSTD))
+        self.assertTrue(os.path.exists(self.page + ".zst"))
+
+
+if __name__ == "__main__":
+    unittest.main()
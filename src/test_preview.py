@@ -0,0 +1,96 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from preview import PreviewRenderer, serve, source_for
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestPreview(unittest.TestCase):
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.home = os.path.join(self.content, "index.md")
+        self.post = os.path.join(self.content, "blog", "tom", "index.md")
+        self.about = os.path.join(self.content, "about.md")
+        self.write(self.home, "# Home\n\n[Tom](/blog/tom)")
+        self.write(self.post, "# Tom\n\nBombadil")
+        self.write(self.about, "# About")
+        self.write(os.path.join(self.static, "index.css"), "body{}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_source_for(self):
+        for path, source in [
+            ("/site/", self.home),
+            ("/site", self.home),
+            ("/site/index.html?x=1", self.home),
+            ("/site/blog/tom", self.post),
+            ("/site/blog/tom/", self.post),
+            ("/site/blog/tom/index.html", self.post),
+            ("/site/about.html", self.about),
+            ("/site/about", self.about),
+            ("/site/blog/%74om/", self.post),
+            ("/site/missing", None),
+            ("/site/index.css", None),
+            ("/other/", None),
+            ("/site/../../etc/passwd", None),
+        ]:
+            self.assertEqual(source_for(path, self.content, "/site/"), source, path)
+
+    def test_render_is_cached_until_the_source_changes(self):
+        renderer = PreviewRenderer(self.template, "/site/")
+        first = renderer.render(self.home)
+        self.assertIn(b'<a href="/site/blog/tom">Tom</a>', first)
+        self.assertIs(renderer.render(self.home), first)
+
+        self.write(self.home, "# Home again")
+        os.utime(self.home, ns=(1, 1))
+        self.assertIn(b"<h1>Home again</h1>", renderer.render(self.home))
+
+        self.write(self.template, "<main>{{ Content }}</main>")
+        os.utime(self.template, ns=(1, 1))
+        self.assertTrue(renderer.render(self.home).startswith(b"<main>"))
+
+    def test_least_recently_used_pages_are_evicted(self):
+        renderer = PreviewRenderer(self.template)
+        home = renderer.render(self.home)
+        renderer.max_bytes = len(home) + len(renderer.render(self.post))
+        renderer.render(self.home)
+        renderer.render(self.about)
+        self.assertEqual(list(renderer.entries), [self.home, self.about])
+        self.assertLessEqual(renderer.size, renderer.max_bytes)
+
+    def test_serves_pages_and_static_files(self):
+        server = serve(self.content, self.static, self.template, 0, "/site/")
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with urllib.request.urlopen(base + "/site/blog/tom/") as response:
+                self.assertIn(b"<p>Bombadil</p>", response.read())
+            with urllib.request.urlopen(base + "/site/index.css") as response:
+                self.assertEqual(response.read(), b"body{}")
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(base + "/site/missing")
+            self.assertEqual(context.exception.code, 404)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from render_context import RenderContext
+
+
+class TestRenderContext(unittest.TestCase):
+    def test_root_basepath_leaves_urls_alone(self):
+        self.assertEqual(RenderContext().url("/blog/tom"), "/blog/tom")
+
+    def test_site_absolute_urls_get_basepath(self):
+        context = RenderContext("/python-static-site/")
+        self.assertEqual(context.url("/"), "/python-static-site/")
+        self.assertEqual(context.url("/images/tom.png"), "/python-static-site/images/tom.png")
+
+    def test_other_urls_are_untouched(self):
+        context = RenderContext("/python-static-site/")
+        self.assertEqual(context.url("https://www.boot.dev"), "https://www.boot.dev")
+        self.assertEqual(context.url("//cdn.example.com/a.js"), "//cdn.example.com/a.js")
+        self.assertEqual(context.url("images/tom.png"), "images/tom.png")
+
+    def test_fingerprinted_assets(self):
+        context = RenderContext("/site/", {"/images/tom.png": "/images/tom.1a2b3c4d.png"})
+        self.assertEqual(context.url("/images/tom.png"), "/site/images/tom.1a2b3c4d.png")
+        self.assertEqual(context.url("/images/tom.png?v=1#top"), "/site/images/tom.1a2b3c4d.png?v=1#top")
+        self.assertEqual(context.url("/images/other.png"), "/site/images/other.png")
+
+    def test_key(self):
+        self.assertEqual(RenderContext("/a/").key, ("/a/",))
+        first = RenderContext("/a/", {"/x.css": "/x.1.css"})
+        second = RenderContext("/a/", {"/x.css": "/x.2.css"})
+        self.assertNotEqual(first.key, RenderContext("/a/").key)
+        self.assertNotEqual(first.key, second.key)
+        self.assertEqual(first.key, RenderContext("/a/", {"/x.css": "/x.1.css"}).key)
+
+    def test_image_sizes_are_part_of_the_key(self):
+        small = RenderContext("/a/", images={"/a.png": (1, 2)})
+        self.assertNotEqual(small.key, RenderContext("/a/").key)
+        self.assertNotEqual(small.key, RenderContext("/a/", images={"/a.png": (2, 1)}).key)
+        self.assertNotEqual(RenderContext("/a/", images={}).key, RenderContext("/a/").key)
+        self.assertEqual(small.image_size("/a.png?v=2"), (1, 2))
+        self.assertIsNone(small.image_size("/b.png"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from build_changes import ADDED, CHANGED, REMOVED
+from search_index import PageText, SearchIndex, page_url, remove_search_index, shard_name, tokenize
+
+
+def page_text(title, body):
+    text = PageText()
+    text.title = title
+    text.add(title)
+    text.add(body)
+    return text
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.out = os.path.join(self.root, "docs")
+        self.state = os.path.join(self.root, "search-index.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.out, "search", name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def written(self, results):
+        return sorted(os.path.basename(path) for path, change in results if change in (ADDED, CHANGED))
+
+    def test_tokenize(self):
+        self.assertEqual(list(tokenize("The Ring, the ring! a Númenor_2")), ["the", "ring", "the", "ring", "númenor_2"])
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("ab"), "ab.json")
+        self.assertEqual(shard_name("nú"), "n_fa_.json")
+        self.assertEqual(shard_name("a_"), "a_5f_.json")
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join(self.out, "index.html"), self.out, "/site/"), "/site/")
+        self.assertEqual(page_url(os.path.join(self.out, "blog", "tom", "index.html"), self.out), "/blog/tom/")
+        self.assertEqual(page_url(os.path.join(self.out, "about.html"), self.out), "/about.html")
+
+    def test_writes_pages_and_shards(self):
+        index = SearchIndex(self.state)
+        index.update("a", "/a/", page_text("Tom", "tom tom bombadil"))
+        index.update("b", "/b/", page_text("Ring", "the tom ring"))
+        index.write(self.out)
+        self.assertEqual(self.read("pages.json"), {"prefix_length": 2, "pages": [["/a/", "Tom"], ["/b/", "Ring"]]})
+        self.assertEqual(self.read("to.json"), {"tom": [[0, 3], [1, 1]]})
+        self.assertEqual(self.read("ri.json"), {"ring": [[1, 2]]})
+
+    def test_only_changed_shards_are_rewritten(self):
+        index = SearchIndex(self.state)
+        index.update("a", "/a/", page_text("Tom", "bombadil"))
+        index.update("b", "/b/", page_text("Ring", "gollum"))
+        index.write(self.out)
+        index.save()
+
+        index = SearchIndex.load(self.state)
+        index.update("a", "/a/", page_text("Tom", "bombadil"))
+        self.assertEqual(self.written(index.write(self.out)), [])
+
+        index.update("a", "/a/", page_text("Tom", "goldberry"))
+        self.assertEqual(self.written(index.write(self.out)), ["go.json"])
+        self.assertEqual(self.read("go.json"), {"goldberry": [[0, 1]], "gollum": [[1, 1]]})
+        self.assertFalse(os.path.exists(os.path.join(self.out, "search", "bo.json")))
+
+    def test_missing_shards_are_rewritten(self):
+        index = SearchIndex(self.state)
+        index.update("a", "/a/", page_text("Tom", "bombadil"))
+        index.write(self.out)
+        os.remove(os.path.join(self.out, "search", "bo.json"))
+        self.assertEqual(self.written(index.write(self.out)), ["bo.json"])
+
+    def test_unwritten_changes_survive_a_save(self):
+        index = SearchIndex(self.state)
+        index.update("a", "/a/", page_text("Tom", "bombadil"))
+        index.write(self.out)
+        index.update("a", "/a/", page_text("Tom", "bombadil bombadil"))
+        index.save()
+        self.assertEqual(self.written(SearchIndex.load(self.state).write(self.out)), ["bo.json"])
+
+    def test_removed_page_ids_are_reused(self):
+        index = SearchIndex(self.state)
+        for name in "abc":
+            index.update(name, f"/{name}/", page_text(name.upper() + "x", "words"))
+        index.write(self.out)
+
+        index.retain(["a", "c"])
+        results = index.write(self.out)
+        self.assertEqual(self.read("pages.json")["pages"], [["/a/", "Ax"], None, ["/c/", "Cx"]])
+        self.assertIn((os.path.join(self.out, "search", "bx.json"), REMOVED), results)
+
+        index.update("d", "/d/", page_text("Dx", "words"))
+        index.write(self.out)
+        self.assertEqual(self.read("pages.json")["pages"][1], ["/d/", "Dx"])
+
+    def test_remove_search_index(self):
+        index = SearchIndex(self.state)
+        index.update("a", "/a/", page_text("Tom", "bombadil"))
+        index.write(self.out)
+        index.save()
+        removed = remove_search_index(self.out, self.state)
+        self.assertEqual(len(removed), 3)
+        self.assertFalse(os.path.exists(os.path.join(self.out, "search")))
+        self.assertFalse(os.path.exists(self.state))
+        self.assertEqual(remove_search_index(self.out, self.state), [])
+
+    def test_other_files_in_search_directory_are_kept(self):
+        other = os.path.join(self.out, "search", "synonyms.json")
+        os.makedirs(os.path.dirname(other))
+        with open(other, 'w', encoding='utf-8') as f:
+            f.write("{}")
+
+        index = SearchIndex(self.state)
+        index.update("a", "/a/", page_text("Tom", "bombadil"))
+        index.write(self.out)
+        index.retain([])
+        results = index.write(self.out)
+        self.assertIn((os.path.join(self.out, "search", "bo.json"), REMOVED), results)
+        self.assertTrue(os.path.exists(other))
+
+        index.update("a", "/a/", page_text("Tom", "bombadil"))
+        index.write(self.out)
+        index.save()
+        self.assertEqual(len(remove_search_index(self.out, self.state)), 3)
+        self.assertEqual(os.listdir(os.path.join(self.out, "search")), ["synonyms.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
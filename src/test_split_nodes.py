@@ -267,5 +267,20 @@ class TestSplitNodesLinkSimple(unittest.TestCase):
         ]
         self.assertEqual(new_nodes, expected)
 
+    def test_link_text_also_inside_image(self):
+        node = TextNode("![a](b) [a](b)", TextType.TEXT)
+        new_nodes = split_nodes_link([node])
+        expected = [
+            TextNode("![a](b) ", TextType.TEXT),
+            TextNode("a", TextType.LINK, "b")
+        ]
+        self.assertEqual(new_nodes, expected)
+
+    def test_many_repeated_links(self):
+        node = TextNode("[a](b) " * 1000, TextType.TEXT)
+        new_nodes = split_nodes_link([node])
+        self.assertEqual(len(new_nodes), 2000)
+        self.assertEqual(new_nodes[-2:], [TextNode("a", TextType.LINK, "b"), TextNode(" ", TextType.TEXT)])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,230 @@
+import contextlib
+import errno
+import io
+import os
+import tempfile
+import unittest
+import static_sync
+from build_changes import BuildChanges
+from build_manifest import BuildManifest
+from render_context import RenderContext
+from static_sync import asset_urls, copy_file, fingerprint_assets, list_files, sync_directory, write_asset_headers
+
+
+class TestStaticSync(unittest.TestCase):
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "docs")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.write(os.path.join(self.src, "index.css"), "body {}")
+        self.write(os.path.join(self.src, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_list_files(self):
+        self.assertEqual(list_files(self.src), [os.path.join("images", "a.png"), "index.css"])
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    @unittest.skipUnless(hasattr(os, "copy_file_range") and hasattr(os, "sendfile"), "needs copy_file_range and sendfile")
+    def test_copy_file_falls_back(self):
+        src_path = os.path.join(self.src, "big.bin")
+        with open(src_path, 'wb') as f:
+            f.write(os.urandom(300000))
+        os.utime(src_path, ns=(1, 1_000_000_000))
+
+        def unsupported(*args):
+            raise OSError(errno.EXDEV, "cross-device")
+
+        saved = static_sync.fcntl, os.copy_file_range, os.sendfile
+        try:
+            # No reflinks, then no copy_file_range, then no sendfile either
+            static_sync.fcntl = None
+            for expected in ["copy_file_range", "sendfile", "read"]:
+                dst_path = os.path.join(self.dst, f"{expected}.bin")
+                os.makedirs(self.dst, exist_ok=True)
+                self.assertEqual(copy_file(src_path, dst_path, replace=False), expected)
+                self.assertEqual(self.read(dst_path), self.read(src_path))
+                self.assertEqual(os.stat(dst_path).st_mtime_ns, 1_000_000_000)
+                if expected == "copy_file_range":
+                    os.copy_file_range = unsupported
+                else:
+                    os.sendfile = unsupported
+        finally:
+            static_sync.fcntl, os.copy_file_range, os.sendfile = saved
+
+    def test_copy_file_replaces_and_links(self):
+        src_path = os.path.join(self.src, "index.css")
+        dst_path = os.path.join(self.dst, "index.css")
+        self.write(dst_path, "old contents")
+        copy_file(src_path, dst_path)
+        self.assertEqual(self.read(dst_path), b"body {}")
+        self.assertNotEqual(os.stat(dst_path).st_ino, os.stat(src_path).st_ino)
+
+        self.assertEqual(copy_file(src_path, dst_path, link=True), "link")
+        self.assertEqual(os.stat(dst_path).st_ino, os.stat(src_path).st_ino)
+
+    def test_in_place_edit_of_linked_file_is_a_change(self):
+        src_path = os.path.join(self.src, "index.css")
+        dst_path = os.path.join(self.dst, "index.css")
+        sync_directory(self.src, self.dst, self.manifest, link=True)
+        self.assertEqual(os.stat(dst_path).st_ino, os.stat(src_path).st_ino)
+
+        with open(src_path, 'a', encoding='utf-8') as f:
+            f.write("p {}")
+        stat = os.stat(src_path)
+        os.utime(src_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        changes = BuildChanges()
+        sync_directory(self.src, self.dst, self.manifest, changes=changes, link=True)
+        self.assertEqual(changes.to_dict(self.dst)["changed"], ["index.css"])
+
+        changes = BuildChanges()
+        sync_directory(self.src, self.dst, self.manifest, changes=changes, link=True)
+        self.assertEqual(changes.to_dict(self.dst)["changed"], [])
+
+        # Syncing without links makes the output a copy of its own
+        changes = BuildChanges()
+        sync_directory(self.src, self.dst, self.manifest, changes=changes)
+        self.assertEqual(changes.to_dict(self.dst)["changed"], [])
+        self.assertNotEqual(os.stat(dst_path).st_ino, os.stat(src_path).st_ino)
+        self.assertEqual(self.read(dst_path), b"body {}p {}")
+        self.assertEqual(self.manifest.links, {})
+
+    def test_threaded_sync_matches_serial(self):
+        for i in range(100):
+            self.write(os.path.join(self.src, f"d{i % 7}", f"f{i}.txt"), f"file {i}")
+        lines = {}
+        for workers in (1, 4):
+            dst = os.path.join(self.tmp.name, f"out{workers}")
+            lines[workers] = []
+            copied, _ = sync_directory(self.src, dst, log=lines[workers].append, workers=workers)
+            self.assertEqual(len(copied), 102)
+            self.assertEqual(
+                {path: self.read(os.path.join(dst, path)) for path in list_files(dst)},
+                {path: self.read(os.path.join(self.src, path)) for path in list_files(self.src)},
+            )
+        self.assertEqual([line.replace("out1", "out4") for line in lines[1]], lines[4])
+
+    def test_second_sync_copies_nothing(self):
+        copied, _ = sync_directory(self.src, self.dst, self.manifest)
+        self.assertEqual(len(copied), 2)
+        copied, removed = sync_directory(self.src, self.dst, self.manifest)
+        self.assertEqual(copied, [])
+        self.assertEqual(removed, [])
+
+    def test_changed_file_is_copied(self):
+        sync_directory(self.src, self.dst, self.manifest)
+        self.write(os.path.join(self.src, "index.css"), "body { color: red }")
+        copied, _ = sync_directory(self.src, self.dst, self.manifest)
+        self.assertEqual(copied, [os.path.join(self.dst, "index.css")])
+
+    def test_removed_file_is_deleted_but_pages_are_kept(self):
+        sync_directory(self.src, self.dst, self.manifest)
+        page = os.path.join(self.dst, "index.html")
+        self.write(page, "<html></html>")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+
+        _, removed = sync_directory(self.src, self.dst, self.manifest)
+
+        self.assertEqual(removed, [os.path.join(self.dst, "images", "a.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_touched_files_are_not_rewritten(self):
+        sync_directory(self.src, self.dst, self.manifest)
+        src_path = os.path.join(self.src, "index.css")
+        dst_path = os.path.join(self.dst, "index.css")
+        os.utime(src_path, (0, 0))
+        os.utime(dst_path, (5, 5))
+        copied, _ = sync_directory(self.src, self.dst, self.manifest)
+        self.assertEqual(copied, [])
+        # The mtimes are lined up so the next sync doesn't hash again
+        self.assertEqual(os.stat(dst_path).st_mtime_ns, 0)
+
+    def test_hash_mode_checks_matching_stats(self):
+        sync_directory(self.src, self.dst, self.manifest)
+        src_path = os.path.join(self.src, "index.css")
+        dst_path = os.path.join(self.dst, "index.css")
+        stat = os.stat(dst_path)
+        self.write(dst_path, "body{ }")
+        os.utime(dst_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        copied, _ = sync_directory(self.src, self.dst, self.manifest)
+        self.assertEqual(copied, [])
+        copied, _ = sync_directory(self.src, self.dst, self.manifest, use_hash=True)
+        self.assertEqual(copied, [dst_path])
+        self.assertEqual(self.read(dst_path), b"body {}")
+
+    def test_changes(self):
+        changes = BuildChanges()
+        sync_directory(self.src, self.dst, self.manifest, changes=changes)
+        self.assertEqual(changes.to_dict(self.dst), {
+            "added": [os.path.join("images", "a.png"), "index.css"],
+            "changed": [],
+            "removed": [],
+        })
+
+        changes = BuildChanges()
+        self.write(os.path.join(self.src, "index.css"), "body { color: red }")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        sync_directory(self.src, self.dst, self.manifest, changes=changes)
+        self.assertEqual(changes.to_dict(self.dst), {
+            "added": [],
+            "changed": ["index.css"],
+            "removed": [os.path.join("images", "a.png")],
+        })
+
+    def test_fingerprinted_sync(self):
+        self.write(os.path.join(self.src, "robots.txt"), "User-agent: *")
+        names = fingerprint_assets(self.src, self.manifest)
+        self.assertEqual(sorted(names), [os.path.join("images", "a.png"), "index.css"])
+        css = names["index.css"]
+        self.assertRegex(css, r"^index\.[0-9a-f]{8}\.css$")
+
+        sync_directory(self.src, self.dst, self.manifest, names=names)
+        self.assertTrue(os.path.exists(os.path.join(self.dst, css)))
+        self.assertTrue(os.path.exists(os.path.join(self.dst, "robots.txt")))
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "index.css")))
+
+        # New content, new name; the old copy goes away
+        self.write(os.path.join(self.src, "index.css"), "body { color: red }")
+        names = fingerprint_assets(self.src, self.manifest)
+        self.assertNotEqual(names["index.css"], css)
+        _, removed = sync_directory(self.src, self.dst, self.manifest, names=names)
+        self.assertEqual(removed, [os.path.join(self.dst, css)])
+
+    def test_asset_headers(self):
+        names = fingerprint_assets(self.src, self.manifest)
+        urls = asset_urls(names)
+        self.assertEqual(urls["/index.css"], "/" + names["index.css"])
+        self.assertEqual(urls["/images/a.png"], "/" + names[os.path.join("images", "a.png")].replace(os.sep, "/"))
+
+        headers = os.path.join(self.dst, "_headers")
+        self.assertEqual(write_asset_headers(self.dst, urls, RenderContext("/site/")), "added")
+        with open(headers, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertIn("/site/" + names["index.css"], lines)
+        self.assertIn("  Cache-Control: public, max-age=31536000, immutable", lines)
+        self.assertIsNone(write_asset_headers(self.dst, urls, RenderContext("/site/")))
+
+        self.assertEqual(write_asset_headers(self.dst, None, RenderContext()), "removed")
+        self.assertFalse(os.path.exists(headers))
+
+    def test_foreign_headers_file_is_kept(self):
+        headers = os.path.join(self.dst, "_headers")
+        self.write(headers, "/*\n  X-Frame-Options: DENY\n")
+        self.assertIsNone(write_asset_headers(self.dst, None, RenderContext()))
+        self.assertTrue(os.path.exists(headers))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from render_context import RenderContext
+from template import compile_template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "template.html")
+        self.write(self.path, "<title>{{ Title }}</title>{% include \"partials/nav.html\" %}<main>{{Content}}</main>")
+        self.write(os.path.join(self.tmp.name, "partials", "nav.html"), "<nav>{{ Title }}</nav>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_render(self):
+        template = compile_template(self.path)
+        self.assertEqual(template.slots, {"Title", "Content"})
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>body</p>"),
+            "<title>Hi</title><nav>Hi</nav><main><p>body</p></main>",
+        )
+
+    def test_streamed_value(self):
+        template = compile_template(self.path)
+        html = template.render(Title="Hi", Content=lambda: iter(["<p>", "chunk", "</p>"]))
+        self.assertEqual(html, "<title>Hi</title><nav>Hi</nav><main><p>chunk</p></main>")
+
+    def test_missing_value_is_left_alone(self):
+        template = compile_template(self.path)
+        self.assertEqual(template.render(Title="Hi"), "<title>Hi</title><nav>Hi</nav><main>{{Content}}</main>")
+
+    def test_bind_rewrites_static_urls_only(self):
+        self.write(self.path, '<link href="/index.css" /><a href="https://x.org">{{ Content }}</a>')
+        template = load_template(self.path, RenderContext("/site/"))
+        self.assertEqual(
+            template.render(Content='src="/raw"'),
+            '<link href="/site/index.css" /><a href="https://x.org">src="/raw"</a>',
+        )
+
+    def test_include_cycle(self):
+        self.write(os.path.join(self.tmp.name, "partials", "nav.html"), "{% include \"nav.html\" %}")
+        with self.assertRaises(Exception) as context:
+            compile_template(self.path)
+        self.assertIn("cycle", str(context.exception))
+
+    def test_cache_is_invalidated_by_mtime(self):
+        template = load_template(self.path)
+        self.assertIs(load_template(self.path), template)
+
+        nav = os.path.join(self.tmp.name, "partials", "nav.html")
+        self.write(nav, "<nav>changed</nav>")
+        stat = os.stat(nav)
+        os.utime(nav, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        reloaded = load_template(self.path)
+        self.assertIsNot(reloaded, template)
+        self.assertNotEqual(reloaded.digest, template.digest)
+        self.assertIn("<nav>changed</nav>", reloaded.render(Title="Hi", Content=""))
+
+
+if __name__ == "__main__":
+    unittest.main()
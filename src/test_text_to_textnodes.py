@@ -1,6 +1,17 @@
 import unittest
 from textnode import TextNode, TextType
 from text_to_textnodes import text_to_textnodes
+from split_nodes import split_nodes_delimiter, split_nodes_image, split_nodes_link
+
+
+def split_chain(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    return nodes
 
 
 class TestTextToTextNodes(unittest.TestCase):
@@ -152,5 +163,72 @@ class TestTextToTextNodes(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+class TestMatchesSplitChain(unittest.TestCase):
+    CASES = [
+        "plain",
+        "**a****b**",
+        "_a_**b**",
+        "**a**_b_`c`",
+        "**bold _not italic_ here**",
+        "_italic `not code` here_",
+        "***a***",
+        "text ![img](a.png)![img2](b.png) more [link](c) end",
+        "**a**![i](u)",
+        "![a](b)[c](d)",
+        "x![a](b[c](d)",
+        "[a](b![c)d](e)",
+        "a![b](c)!",
+    ]
+
+    def test_same_nodes(self):
+        for text in self.CASES:
+            with self.subTest(text=text):
+                self.assertEqual(text_to_textnodes(text), split_chain(text))
+
+    def test_chain_errors_become_literal(self):
+        # The split chain raises on these; the scanner keeps the delimiter as text
+        cases = {
+            "**a": [TextNode("**a", TextType.TEXT)],
+            "a _b": [TextNode("a _b", TextType.TEXT)],
+            "`a_b`": [
+                TextNode("", TextType.TEXT),
+                TextNode("a_b", TextType.CODE),
+                TextNode("", TextType.TEXT),
+            ],
+            "_a **b** c_": [
+                TextNode("", TextType.TEXT),
+                TextNode("a **b** c", TextType.ITALIC),
+                TextNode("", TextType.TEXT),
+            ],
+            "**[a](b)**": [
+                TextNode("**", TextType.TEXT),
+                TextNode("a", TextType.LINK, "b"),
+                TextNode("**", TextType.TEXT),
+            ],
+            "**a** and **b": [
+                TextNode("", TextType.TEXT),
+                TextNode("a", TextType.BOLD),
+                TextNode(" and **b", TextType.TEXT),
+            ],
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                with self.assertRaises(Exception):
+                    split_chain(text)
+                self.assertEqual(text_to_textnodes(text), expected)
+
+    def test_unmatched_after_link_is_per_run(self):
+        # An unmatched _ before a link doesn't stop _ pairs after it
+        self.assertEqual(
+            text_to_textnodes("a_b [l](u) _c_"),
+            [
+                TextNode("a_b ", TextType.TEXT),
+                TextNode("l", TextType.LINK, "u"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("c", TextType.ITALIC),
+                TextNode("", TextType.TEXT),
+            ],
+        )
+
 if __name__ == "__main__":
     unittest.main()
@@ -18,6 +18,10 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.BOLD, "test.url")
         self.assertNotEqual(node, node2)
 
+    def test_slotted(self):
+        node = TextNode("Test", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+import watch
+from watch import RELOAD_SCRIPT, WATCHED_PATHS, ReloadNotifier, changed_paths, serve, snapshot, watched_paths
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_snapshot_detects_changes(self):
+        page = os.path.join(self.root, "content", "index.md")
+        self.write(page, "# Home")
+        before = snapshot([os.path.join(self.root, "content")])
+
+        self.write(page, "# Home page")
+        added = os.path.join(self.root, "content", "blog", "post.md")
+        self.write(added, "# Post")
+        after = snapshot([os.path.join(self.root, "content")])
+
+        self.assertEqual(changed_paths(before, after), sorted([added, page]))
+        self.assertEqual(changed_paths(after, after), [])
+
+    def test_notifier_wakes_waiters(self):
+        notifier = ReloadNotifier()
+        threading.Timer(0.01, notifier.notify).start()
+        self.assertEqual(notifier.wait(0, timeout=5), 1)
+
+    def test_served_html_gets_reload_script(self):
+        self.write(os.path.join(self.root, "index.html"), "<html><body><p>hi</p></body></html>")
+        server = serve(self.root, 0, ReloadNotifier())
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/"
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(body, f"<html><body><p>hi</p>{RELOAD_SCRIPT}</body></html>")
+
+    def test_served_under_basepath(self):
+        self.write(os.path.join(self.root, "index.html"), "<html><body>home</body></html>")
+        self.write(os.path.join(self.root, "index.css"), "body {}")
+        server = serve(self.root, 0, ReloadNotifier(), "/site/")
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(base + "/site/") as response:
+                self.assertIn("home", response.read().decode('utf-8'))
+            with urllib.request.urlopen(base + "/site/index.css") as response:
+                self.assertEqual(response.read(), b"body {}")
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(base + "/index.css")
+            self.assertEqual(context.exception.code, 404)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_template_includes_are_watched(self):
+        template = os.path.join(self.root, "template.html")
+        nav = os.path.join(self.root, "partials", "nav.html")
+        self.write(template, '<body>{% include "partials/nav.html" %}{{ Content }}</body>')
+        self.write(nav, "<nav></nav>")
+        with mock.patch.object(watch, "TEMPLATE_PATH", template):
+            self.assertEqual(watched_paths(), WATCHED_PATHS + sorted([nav, template]))
+            os.remove(nav)
+            self.assertEqual(watched_paths(), WATCHED_PATHS)
+
+
+if __name__ == "__main__":
+    unittest.main()
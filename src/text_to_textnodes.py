@@ -1,18 +1,83 @@
+import re
 from textnode import TextNode, TextType
-from split_nodes import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from extract_markdown import IMAGE_PATTERN
+
+TOKEN_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)|\*\*|_|`")
+
+
+DELIMITER_TYPES = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
 
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    
-    nodes = split_nodes_image(nodes)
-    
-    nodes = split_nodes_link(nodes)
-    
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    
+    """Split inline markdown into TextNodes in a single left-to-right scan.
+
+    Produces the same nodes as running split_nodes_image, split_nodes_link and
+    the **, _ and ` delimiter splits one after another: images win over links,
+    links and images end any formatting run, and bold > italic > code, so e.g.
+    backticks inside bold stay literal. Where that chain would raise on an
+    unmatched delimiter, the delimiter is kept as literal text instead.
+    """
+    if not text:
+        return [TextNode(text, TextType.TEXT)]
+
+    nodes = []
+    pos = 0
+    for image in IMAGE_PATTERN.finditer(text):
+        scan_segment(text, pos, image.start(), nodes)
+        nodes.append(TextNode(image.group(1), TextType.IMAGE, image.group(2)))
+        pos = image.end()
+    scan_segment(text, pos, len(text), nodes)
     return nodes
+
+
+def scan_segment(text, pos, end, nodes):
+    # Only one delimiter is open at a time; any other delimiter inside it is literal
+    opener = None
+    # Delimiters found to be unmatched: literal before the given position
+    literal_until = {}
+    split = False
+    start = pos
+
+    while True:
+        token = TOKEN_PATTERN.search(text, pos, end)
+        if token is not None and token.group(1) is None:
+            delimiter = token.group()
+            pos = token.end()
+            if opener is None:
+                if literal_until.get(delimiter, -1) > token.start():
+                    continue
+                # Remember how to undo this in case it is never closed
+                undo = (len(nodes), start, split, token.start())
+                nodes.append(TextNode(text[start:token.start()], TextType.TEXT))
+                opener = delimiter
+            elif delimiter == opener:
+                nodes.append(TextNode(text[start:token.start()], DELIMITER_TYPES[delimiter]))
+                opener = None
+            else:
+                continue
+            split = True
+            start = pos
+            continue
+
+        # A link or the end of the segment ends the current run
+        run_end = end if token is None else token.start()
+        if opener is not None:
+            # Unmatched: rescan from the opener with it literal. Each delimiter
+            # can only be disabled once per run, so a run is scanned at most
+            # four times and the whole scan stays linear.
+            mark, start, split, pos = undo
+            del nodes[mark:]
+            literal_until[opener] = run_end
+            opener = None
+            continue
+        if token is None:
+            break
+
+        if split or token.start() > start:
+            nodes.append(TextNode(text[start:token.start()], TextType.TEXT))
+        nodes.append(TextNode(token.group(1), TextType.LINK, token.group(2)))
+        split = False
+        start = pos = token.end()
+
+    if split or end > start:
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
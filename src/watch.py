@@ -0,0 +1,197 @@
+import argparse
+import functools
+import http.server
+import os
+import threading
+import time
+import urllib.parse
+from main import build
+from template import load_template
+
+TEMPLATE_PATH = "template.html"
+WATCHED_PATHS = ["content", "static", TEMPLATE_PATH]
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    f'<script>new EventSource("{RELOAD_PATH}").onmessage = function () {{ location.reload(); }};</script>'
+)
+
+
+def watched_paths():
+    """WATCHED_PATHS plus every file the template includes."""
+    try:
+        dependencies = load_template(TEMPLATE_PATH).dependencies
+    except Exception:
+        # Missing or broken for now; the rebuild will say why
+        return WATCHED_PATHS
+    return WATCHED_PATHS + sorted(path for path in dependencies if path not in WATCHED_PATHS)
+
+
+def snapshot(paths):
+    files = {}
+    stack = list(paths)
+    while stack:
+        path = stack.pop()
+        try:
+            if os.path.isdir(path):
+                with os.scandir(path) as entries:
+                    stack.extend(entry.path for entry in entries)
+            else:
+                stat = os.stat(path)
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            continue
+    return files
+
+
+def changed_paths(before, after):
+    return sorted(path for path in before.keys() | after.keys() if before.get(path) != after.get(path))
+
+
+class ReloadNotifier:
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class LiveReloadHandler(http.server.SimpleHTTPRequestHandler):
+    notifier = None
+    basepath = "/"
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.send_events()
+            return
+        if not self.in_basepath():
+            self.send_error(404)
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            self.send_html(path)
+            return
+        super().do_GET()
+
+    def do_HEAD(self):
+        if not self.in_basepath():
+            self.send_error(404)
+            return
+        super().do_HEAD()
+
+    def in_basepath(self):
+        path = urllib.parse.urlsplit(self.path).path
+        return path.startswith(self.basepath) or path + "/" == self.basepath
+
+    def translate_path(self, path):
+        # Pages are built for the basepath, so that's where the output directory is served
+        path = urllib.parse.urlsplit(path).path
+        if path + "/" == self.basepath:
+            path = self.basepath
+        return super().translate_path("/" + path[len(self.basepath):])
+
+    def send_html(self, path):
+        with open(path, 'rb') as f:
+            body = f.read()
+        script = RELOAD_SCRIPT.encode('utf-8')
+        index = body.rfind(b"</body>")
+        body = body[:index] + script + body[index:] if index != -1 else body + script
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        version = self.notifier.version
+        try:
+            while True:
+                new_version = self.notifier.wait(version, timeout=15)
+                if new_version == version:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    self.wfile.write(b"data: reload\n\n")
+                    version = new_version
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(dest_dir, port, notifier, basepath="/"):
+    handler = functools.partial(LiveReloadHandler, directory=dest_dir)
+    LiveReloadHandler.notifier = notifier
+    LiveReloadHandler.basepath = basepath
+    server = http.server.ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def rebuild(basepath, dest_dir, jobs):
+    start = time.perf_counter()
+    try:
+        build(basepath, dest_dir, jobs=jobs)
+    except Exception as e:
+        print(f"Build failed: {e}")
+        return False
+    print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return True
+
+
+def watch(basepath="/", dest_dir="docs", port=8888, interval=0.2, jobs=1):
+    notifier = ReloadNotifier()
+    rebuild(basepath, dest_dir, jobs)
+    serve(dest_dir, port, notifier, basepath)
+    print(f"\nServing {dest_dir} on http://localhost:{port}{basepath} and watching {', '.join(watched_paths())}")
+
+    # Polling keeps this portable; the build manifest makes each rebuild only touch what changed.
+    # The template's includes are looked up again each time, as editing it can add or drop some
+    state = snapshot(watched_paths())
+    while True:
+        time.sleep(interval)
+        new_state = snapshot(watched_paths())
+        changed = changed_paths(state, new_state)
+        if not changed:
+            continue
+        state = new_state
+        for path in changed:
+            print(f"Changed: {path}")
+        if rebuild(basepath, dest_dir, jobs):
+            notifier.notify()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the site on changes and live-reload open pages.")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served from")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between checks for changes")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes for page generation")
+    args = parser.parse_args()
+
+    try:
+        watch(args.basepath, "docs", args.port, args.interval, args.jobs)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()